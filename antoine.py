@@ -1,65 +1,85 @@
+import io
 import numpy as np
 import pandas as pd
+from cache import DiskCache
+from components import get_registry
+from fetch import get_text
+from memo import memoize
+from metrics import timed
+from vlestore import ANTOINE_KEYS
 
+ANTOINE_URL = 'http://ddbonline.ddbst.com/AntoineCalculation/AntoineCalculationCGI.exe?component='
+MMHG_TO_KPA = 101.325 / 760
 
-def get_psat(s, T):
-    antoine_url = 'http://ddbonline.ddbst.com/AntoineCalculation/AntoineCalculationCGI.exe?component=' + s
 
-    antoine = pd.read_html(antoine_url)[6]
+@timed('parse', page='antoine')
+def parse_antoine(html):
+    # every coefficient set on the DDBST page: log10(P/mmHg) = A - B / (T/°C + C), valid for Tmin <= T/°C <= Tmax
+    antoine = pd.read_html(io.StringIO(html))[6]
     antoine = antoine.drop(antoine.index[0:3]).drop('No.', axis=1)
-
-    if len(antoine) == 4:
-        Tmin = np.array([float(antoine['Tmin'][3]), float(antoine['Tmin'][4])])
-
-        Tmax = np.array([float(antoine['Tmax'][3]), float(antoine['Tmax'][4])])
-
-        A = np.array([float(antoine['A'][3]), float(antoine['A'][3])])
-        B = np.array([float(antoine['B'][3]), float(antoine['B'][3])])
-        C = np.array([float(antoine['C'][3]), float(antoine['C'][3])])
-
-        for i in range(2):
-            if Tmin[i] <= (T - 273.15) <= Tmax[i]:
-                psat = (101.325 / 760) * np.power(10, A[i] - B[i] / (T - 273.15 + C[i]))  # in kPa
-    else:
-        Tmin = antoine['Tmin'][3]
-
-        Tmax = float(antoine['Tmax'][3])
-
-        A = float(antoine['A'][3])
-        B = float(antoine['B'][3])
-        C = float(antoine['C'][3])
-
-    def psat(T):
-        return (101.325 / 760) * np.power(10, A - B / (T - 273.15 + C))  # in kPa
-
-    return psat(T)
+    sets = {key: [] for key in ('A', 'B', 'C', 'Tmin', 'Tmax')}
+    for _, row in antoine.iterrows():
+        try:
+            values = {key: float(row[key]) for key in sets}
+        except (TypeError, ValueError):
+            continue
+        if np.isnan(values['A']):
+            continue
+        for key in sets:
+            sets[key].append(values[key])
+    if not sets['A']:
+        raise ValueError('no Antoine coefficients found')
+    return {key: np.array(value) for key, value in sets.items()}
+
+
+class AntoineStore:
+    def __init__(self, disk=None):
+        self.disk = disk if disk is not None else DiskCache('antoine')
+
+    def sets(self, component):
+        # (k, 5) array of the component's coefficient sets, columns ANTOINE_KEYS
+        registry = get_registry()
+        i = registry.id(component)
+        if not registry.has_antoine(i):
+            registry.set_antoine(i, self.disk.get_or_fetch(
+                component, lambda: parse_antoine(get_text(ANTOINE_URL + component))))
+        return registry.antoine_sets(i)
+
+    def params(self, component):
+        sets = self.sets(component)
+        return {key: sets[:, k] for k, key in enumerate(ANTOINE_KEYS)}
+
+    def coefficients(self, component, T):
+        # A, B, C of the set whose range contains T (K), or the nearest range if none does
+        A, B, C, Tmin, Tmax = self.sets(component).T
+        T_C = np.asarray(T, dtype=float) - 273.15
+        distance = np.maximum(np.maximum(Tmin - T_C[..., None], T_C[..., None] - Tmax), 0)
+        k = np.argmin(distance, axis=-1)
+        return A[k], B[k], C[k]
+
+    def psat(self, component, T):
+        A, B, C = self.coefficients(component, T)
+        psat = MMHG_TO_KPA * np.power(10, A - B / (np.asarray(T, dtype=float) - 273.15 + C))  # in kPa
+        return psat[()] if np.ndim(psat) == 0 else psat
+
+    def dlnpsat_dT(self, component, T):
+        A, B, C = self.coefficients(component, T)
+        slope = np.log(10) * B / (np.asarray(T, dtype=float) - 273.15 + C) ** 2  # in 1/K
+        return slope[()] if np.ndim(slope) == 0 else slope
+
+    def vapor_pressure(self, component):
+        # T -> (psat, dln(psat)/dT), the form the bubble/dew solvers take
+        return lambda T: (self.psat(component, T), self.dlnpsat_dT(component, T))
+
+
+store = AntoineStore()
+
+
+@memoize()
+def get_psat(s, T):
+    return store.psat(s, T)
 
 
 def get_Antoine_params(s):
-    antoine_url = 'http://ddbonline.ddbst.com/AntoineCalculation/AntoineCalculationCGI.exe?component=' + s
-
-    antoine = pd.read_html(antoine_url)[6]
-    antoine = antoine.drop(antoine.index[0:3]).drop('No.', axis=1)
-
-    if len(antoine) == 4:
-        Tmin = np.array([float(antoine['Tmin'][3]), float(antoine['Tmin'][4])])
-
-        Tmax = np.array([float(antoine['Tmax'][3]), float(antoine['Tmax'][4])])
-
-        A = np.array([float(antoine['A'][3]), float(antoine['A'][3])])
-        B = np.array([float(antoine['B'][3]), float(antoine['B'][3])])
-        C = np.array([float(antoine['C'][3]), float(antoine['C'][3])])
-
-        for i in range(2):
-            if Tmin[i] <= (T - 273.15) <= Tmax[i]:
-                psat = (101.325 / 760) * np.power(10, A[i] - B[i] / (T - 273.15 + C[i]))  # in kPa
-    else:
-        Tmin = antoine['Tmin'][3]
-
-        Tmax = float(antoine['Tmax'][3])
-
-        A = float(antoine['A'][3])
-        B = float(antoine['B'][3])
-        C = float(antoine['C'][3])
-
-    return [A, B, C]
+    p = store.params(s)
+    return [p['A'][0], p['B'][0], p['C'][0]]
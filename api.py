@@ -0,0 +1,218 @@
+import argparse
+import json
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import numpy as np
+import pandas as pd
+from antoine import get_psat, store as antoine_store
+from bubbledew import bubble_P, bubble_T, dew_P, dew_T
+from columndesign import sweep
+from components import canonical
+from equilibrium import activity_coefficients
+import metrics
+from vledata import get_datasets, link_generator, stack
+import models.leaderboard
+from models.uniquac import UNIQUAC
+
+# Stateless JSON API over the same calculations the pages use. Every POST body is one request
+# object or a list of them (a batch); each object is computed in a worker process and a batch
+# answers with a list in the same order, failed items as {"error": ...}. Non-finite numbers
+# (for example the stage count of a pinched column) are sent as null. GET /metrics serves the
+# stage timings and counters of every request (VLE_METRICS=1) in the Prometheus text format.
+
+WORKERS = int(os.environ.get('VLE_API_WORKERS', os.cpu_count() or 1))
+
+
+def pair(payload):
+    # display names ("Diethyl ether") and page names ("Diethyl%20ether") are both accepted
+    return canonical(payload['c1']), canonical(payload['c2'])
+
+
+def datasets(payload):
+    c1, c2 = pair(payload)
+    found = get_datasets(c1, c2)
+    # x1 and y1 are of the first component of each dataset's pair, the page's name order
+    if str(payload.get('stacked', '')).lower() in ('1', 'true'):
+        # for batch work: one x1, y1, T, P row per point, dataset i in rows offsets[i]:offsets[i + 1]
+        offsets, values = stack(found)
+        return {'url': link_generator(c1, c2), 'pair': [d.pair for d in found], 'kind': [d.kind for d in found],
+                'condition': [d.condition for d in found], 'offsets': offsets, 'values': values}
+    return {'url': link_generator(c1, c2), 'datasets': [dataset.to_record() for dataset in found]}
+
+
+def interior(x1, y1, values):
+    # the points with 0 < x1 < 1, as VLEDataset.interior: the pure-component ends /datasets
+    # returns carry no activity coefficient
+    keep = (x1 > 0) & (x1 < 1)
+    if keep.sum() < 2:
+        raise ValueError('at least two points with 0 < x1 < 1 are needed')
+    return x1[keep], y1[keep], np.broadcast_to(values, x1.shape)[keep]
+
+
+def fit(payload):
+    # isothermal data (x1, y1, P at one T) against every G^E model, or isobaric data
+    # (x1, y1, T at one P) with "model": "UNIQUAC"
+    c1, c2 = pair(payload)
+    x1 = np.asarray(payload['x1'], dtype=float)
+    y1 = np.asarray(payload['y1'], dtype=float)
+    if payload.get('model') == 'UNIQUAC':
+        x1, y1, T = interior(x1, y1, np.asarray(payload['T'], dtype=float))
+        P = float(payload['P'])
+        gamma1 = P * y1 / (x1 * get_psat(c1, T))
+        gamma2 = P * (1 - y1) / ((1 - x1) * get_psat(c2, T))
+        result = UNIQUAC(c1, c2).get_parameter([x1, T], np.concatenate((gamma1, gamma2)))
+        return {'model': 'UNIQUAC', 'params': result['x'], 'cost': result['cost']}
+
+    x1, y1, P = interior(x1, y1, np.asarray(payload['P'], dtype=float))
+    T = float(payload['T'])
+    p1_s, p2_s = get_psat(c1, T), get_psat(c2, T)
+    G_e = activity_coefficients(x1, y1, P, p1_s, p2_s, T)[2]
+    table = models.leaderboard.fit_all(x1, y1, P, G_e, p1_s, p2_s, T, c1, c2, payload.get('models'))
+    return {'p1_s': p1_s, 'p2_s': p2_s, 'models': table.drop(columns='Parameters')}
+
+
+def vle(payload):
+    # bubble_P / bubble_T from x, dew_P / dew_T from y; ideal liquid unless UNIQUAC
+    # parameters [u12 - u22, u21 - u11] are given
+    c1, c2 = pair(payload)
+    psat1, psat2 = antoine_store.vapor_pressure(c1), antoine_store.vapor_pressure(c2)
+    activity = UNIQUAC(c1, c2).activity(*payload['uniquac']) if payload.get('uniquac') else None
+    calculation = payload['calculation']
+    if calculation == 'bubble_P':
+        P, y, report = bubble_P(np.asarray(payload['x'], dtype=float), float(payload['T']), psat1, psat2, activity)
+        return {'P': P, 'y': y, 'converged': report.converged}
+    if calculation == 'bubble_T':
+        T, y, report = bubble_T(np.asarray(payload['x'], dtype=float), float(payload['P']), psat1, psat2, activity)
+        return {'T': T, 'y': y, 'converged': report.converged}
+    if calculation == 'dew_P':
+        P, x, report = dew_P(np.asarray(payload['y'], dtype=float), float(payload['T']), psat1, psat2, activity)
+        return {'P': P, 'x': x, 'converged': report.converged}
+    if calculation == 'dew_T':
+        T, x, report = dew_T(np.asarray(payload['y'], dtype=float), float(payload['P']), psat1, psat2, activity)
+        return {'T': T, 'x': x, 'converged': report.converged}
+    raise ValueError('unknown calculation %r' % calculation)
+
+
+def mccabe_thiele(payload):
+    # every combination of the given values, scalars or lists, as in the page's design sweep
+    names = ['F', 'zf', 'xd', 'xb', 'R', 'q', 'alpha']
+    missing = [name for name in names if name not in payload]
+    if missing:
+        raise KeyError('missing %s' % ', '.join(missing))
+    table = sweep(*(payload[name] for name in names), max_stages=int(payload.get('max_stages', 99)))
+    return {'designs': table}
+
+
+HANDLERS = {'/datasets': datasets, '/fit': fit, '/vle': vle, '/mccabe-thiele': mccabe_thiele}
+
+
+def jsonable(value):
+    if isinstance(value, pd.DataFrame):
+        return [jsonable(row) for row in value.to_dict('records')]
+    if isinstance(value, dict):
+        return {str(k): jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, np.ndarray, pd.Series)):
+        return [jsonable(v) for v in value]
+    if isinstance(value, (np.bool_, bool)):
+        return bool(value)
+    if isinstance(value, (np.integer, int)):
+        return int(value)
+    if isinstance(value, (np.floating, float)):
+        return float(value) if math.isfinite(value) else None
+    return value
+
+
+def call(path, payload):
+    # runs in a worker process; what it measured goes back with the result, into the server's registry
+    with metrics.collect(path) as record:
+        result = jsonable(HANDLERS[path](payload))
+    return result, None if record is None else record.snapshot()
+
+
+def answer(pool, path, payload):
+    items = payload if isinstance(payload, list) else [payload]
+    futures = [pool.submit(call, path, item) for item in items]
+    results = []
+    for future in futures:
+        try:
+            result, measured = future.result()
+            if measured is not None:
+                metrics.registry.merge(measured)
+            results.append(result)
+            metrics.inc('api_requests', endpoint=path, result='ok')
+        except Exception as e:
+            results.append({'error': '%s: %s' % (type(e).__name__, e)})
+            metrics.inc('api_requests', endpoint=path, result='error')
+    return results if isinstance(payload, list) else results[0]
+
+
+class Handler(BaseHTTPRequestHandler):
+    def send_json(self, status, body):
+        self.send(status, 'application/json', json.dumps(body).encode())
+
+    def send(self, status, content_type, data):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == '/health':
+            self.send_json(200, {'status': 'ok', 'endpoints': sorted(HANDLERS)})
+        elif url.path == '/metrics':
+            self.send(200, 'text/plain; version=0.0.4', metrics.exposition().encode())
+        elif url.path == '/datasets':
+            query = {k: v[0] for k, v in parse_qs(url.query).items()}
+            self.respond(url.path, query)
+        else:
+            self.send_json(404, {'error': 'no such endpoint %s' % url.path})
+
+    def do_POST(self):
+        path = urlparse(self.path).path
+        if path not in HANDLERS:
+            self.send_json(404, {'error': 'no such endpoint %s' % path})
+            return
+        try:
+            payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'null')
+        except ValueError as e:
+            self.send_json(400, {'error': 'invalid JSON: %s' % e})
+            return
+        if not isinstance(payload, (dict, list)):
+            self.send_json(400, {'error': 'expected a request object or a list of them'})
+            return
+        self.respond(path, payload)
+
+    def respond(self, path, payload):
+        with metrics.span('api', endpoint=path):
+            result = answer(self.server.pool, path, payload)
+        failed = isinstance(result, dict) and 'error' in result
+        self.send_json(422 if failed else 200, result)
+
+
+def serve(host='127.0.0.1', port=8502, workers=WORKERS):
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        server.serve_forever()
+    finally:
+        server.pool.shutdown()
+        server.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve the VLE calculations as a JSON API.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8502)
+    parser.add_argument('--workers', type=int, default=WORKERS, help='worker processes for the calculations')
+    args = parser.parse_args(argv)
+    print('Serving on http://%s:%d with %d workers' % (args.host, args.port, args.workers))
+    serve(args.host, args.port, args.workers)
+
+
+if __name__ == '__main__':
+    main()
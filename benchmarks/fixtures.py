@@ -0,0 +1,95 @@
+import numpy as np
+from standin import Fixtures
+
+# A fixed, synthetic acetone/water system written as DDBST-shaped pages, so the benchmarks run
+# the same parsers on the same bytes everywhere. Recorded fixtures (standin.py record) can be
+# used instead with --fixtures.
+
+C1, C2 = 'Acetone', 'Water'
+T_ISOTHERMAL = 323.15  # K
+P_ISOBARIC = 101.325  # kPa
+N_POINTS = 25
+
+# log10(P/mmHg) = A - B / (T/°C + C) for Tmin <= T/°C <= Tmax
+ANTOINE = {'Acetone': [(7.11714, 1210.595, 229.664, -13, 55), (7.63130, 1566.69, 273.419, 57, 205)],
+           'Water': [(8.07131, 1730.63, 233.426, 1, 100), (8.14019, 1810.94, 244.485, 99, 374)]}
+# DIPPR-105 A, B, C, D, Tmin, Tmax with A in kg/m3
+DIPPR105 = {'Acetone': (71.6245, 0.25886, 508.2, 0.2913, 178.45, 508.2),
+            'Water': (98.3440, 0.30542, 647.13, 0.081, 273.16, 333.15)}
+# ln γ1 = A12 x2^2, ln γ2 = A21 x1^2 at the isothermal temperature, scaled with 1/T
+A12, A21 = 2.0, 1.5
+
+
+def table(header, rows):
+    head = ''.join('<th>%s</th>' % h for h in header)
+    body = ''.join('<tr>%s</tr>' % ''.join('<td>%s</td>' % v for v in row) for row in rows)
+    return '<table><tr>%s</tr>%s</table>' % (head, body)
+
+
+def constants_page(header, sets):
+    # the constants are the seventh table, after three rows of headings
+    preamble = ''.join('<table><tr><td>%d</td></tr></table>' % i for i in range(6))
+    rows = [('',) * (len(header))] * 3 + [(i + 1,) + tuple(s) for i, s in enumerate(sets)]
+    return '<html><body>%s%s</body></html>' % (preamble, table(header, rows))
+
+
+def psat(component, T):
+    # kPa, from the first set whose range reaches T
+    T_C = np.asarray(T, dtype=float) - 273.15
+    A, B, C, Tmin, Tmax = np.array(ANTOINE[component]).T
+    k = np.minimum((T_C[..., None] > Tmax).sum(axis=-1), len(A) - 1)
+    return 101.325 / 760 * 10 ** (A[k] - B[k] / (T_C + C[k]))
+
+
+def gammas(x, T):
+    scale = T_ISOTHERMAL / T
+    return np.exp(scale * A12 * (1 - x) ** 2), np.exp(scale * A21 * x ** 2)
+
+
+def isothermal_rows(rng):
+    x = np.linspace(0, 1, N_POINTS)
+    g1, g2 = gammas(x, T_ISOTHERMAL)
+    p1, p2 = x * g1 * psat(C1, T_ISOTHERMAL), (1 - x) * g2 * psat(C2, T_ISOTHERMAL)
+    P = (p1 + p2) * (1 + 0.005 * rng.standard_normal(N_POINTS))
+    y = p1 / (p1 + p2)
+    return [('%.3f' % P[i], '%.4f' % x[i], '%.4f' % y[i]) for i in range(N_POINTS)]
+
+
+def isobaric_rows(rng):
+    # bubble temperatures by bisection on the same activity model
+    x = np.linspace(0, 1, N_POINTS)
+    lo, hi = np.full(N_POINTS, 300.0), np.full(N_POINTS, 400.0)
+    for _ in range(60):
+        T = 0.5 * (lo + hi)
+        g1, g2 = gammas(x, T)
+        above = x * g1 * psat(C1, T) + (1 - x) * g2 * psat(C2, T) > P_ISOBARIC
+        hi, lo = np.where(above, T, hi), np.where(above, lo, T)
+    g1, g2 = gammas(x, T)
+    y = x * g1 * psat(C1, T) / P_ISOBARIC
+    T = T + 0.05 * rng.standard_normal(N_POINTS)
+    return [('%.2f' % T[i], '%.4f' % x[i], '%.4f' % y[i]) for i in range(N_POINTS)]
+
+
+def vle_page():
+    rng = np.random.default_rng(0)
+    isothermal = '<table><tr><td>Temperature [K]</td><td>%s</td></tr></table>' % T_ISOTHERMAL
+    isothermal += table(['P [kPa]', 'x1 [mol/mol]', 'y1 [mol/mol]'], isothermal_rows(rng))
+    isobaric = '<table><tr><td>Pressure [kPa]</td><td>%s</td></tr></table>' % P_ISOBARIC
+    isobaric += table(['T [K]', 'x1 [mol/mol]', 'y1 [mol/mol]'], isobaric_rows(rng))
+    return '<html><body><table><tr><td>%s; %s</td></tr></table>%s%s</body></html>' % (C1, C2, isothermal, isobaric)
+
+
+def build(directory):
+    # every page the pipelines fetch, the reversed pair order as the 404 DDBST gives for it
+    from antoine import ANTOINE_URL
+    from density import DENSITY_URL
+    from vledata import page_url
+    fixtures = Fixtures(directory)
+    fixtures.save(page_url(C1, C2), 200, 'text/html', vle_page())
+    fixtures.save(page_url(C2, C1), 404, 'text/html', 'Not Found')
+    for c in (C1, C2):
+        fixtures.save(ANTOINE_URL + c, 200, 'text/html',
+                      constants_page(['No.', 'A', 'B', 'C', 'Tmin', 'Tmax'], ANTOINE[c]))
+        fixtures.save(DENSITY_URL + c, 200, 'text/html',
+                      constants_page(['No.', 'A', 'B', 'C', 'D', 'Tmin', 'Tmax'], [DIPPR105[c]]))
+    return fixtures
@@ -0,0 +1,96 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+
+# Cold-start cost of the app, run from the repository root as `python -m benchmarks.imports`.
+# Every target is imported (modules) or run (the page script, which shows the Home page in bare
+# mode) in a fresh interpreter, so nothing is in sys.modules yet, as on a dyno that scaled to zero.
+# Reports the median seconds of every target and, with --top, the packages `python -X importtime`
+# says the time went to. With --baseline the run fails if a target got slower than allowed.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'imports_baseline.json')
+TARGETS = ('chem-engg-tools.py', 'home', 'correlations', 'isobaric', 'mccabethiele', 'api')
+# differences below this are noise, whatever the relative change
+SLACK = 0.02
+
+
+def statement(target):
+    if target.endswith('.py'):
+        return 'import runpy; runpy.run_path(%r, run_name="__main__")' % target
+    return 'import %s' % target
+
+
+def child(target, importtime=False):
+    code = 'import time; start = time.perf_counter(); %s; print(time.perf_counter() - start)' % statement(target)
+    options = ['-X', 'importtime'] if importtime else []
+    return subprocess.run([sys.executable] + options + ['-c', code], cwd=ROOT, stdout=subprocess.PIPE,
+                          stderr=subprocess.PIPE, universal_newlines=True, check=True)
+
+
+def cold_start(target):
+    return float(child(target).stdout.split()[-1])
+
+
+def packages(target):
+    # {top-level package: seconds of its own imports}, from the -X importtime lines on stderr
+    found = {}
+    for line in child(target, importtime=True).stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        package = name.strip().split('.')[0]
+        found[package] = found.get(package, 0) + int(self_us) / 1e6
+    return found
+
+
+def regressions(results, baseline, tolerance):
+    return [(target, baseline[target], seconds) for target, seconds in results.items()
+            if target in baseline and seconds > max(baseline[target] * (1 + tolerance), baseline[target] + SLACK)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Measure the cold import time of the app and its pages.')
+    parser.add_argument('targets', nargs='*', default=TARGETS, help='modules, or scripts ending in .py')
+    parser.add_argument('--repeat', type=int, default=5, help='fresh interpreters per target, the median is reported')
+    parser.add_argument('--top', type=int, default=0, help='also list the N packages each target spends most on')
+    parser.add_argument('--baseline', default=BASELINE, help='compare with, and --save-baseline writes, this file')
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed relative increase of any target')
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)['targets']
+
+    results = {}
+    print('%-24s %10s %10s %8s' % ('target', 'cold ms', 'base ms', 'vs base'))
+    for target in args.targets:
+        results[target] = statistics.median(cold_start(target) for _ in range(args.repeat))
+        before = baseline.get(target)
+        print('%-24s %10.1f %10s %8s' % (target, 1e3 * results[target], '%.1f' % (1e3 * before) if before else '',
+                                         '%+.0f%%' % (100 * (results[target] / before - 1)) if before else ''))
+        if args.top:
+            for package, seconds in sorted(packages(target).items(), key=lambda item: -item[1])[:args.top]:
+                print('    %-20s %10.1f' % (package, 1e3 * seconds))
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump({'python': platform.python_version(), 'machine': platform.machine(), 'repeat': args.repeat,
+                       'targets': results}, f, indent=1)
+        print('Baseline written to %s' % args.baseline)
+        return 0
+
+    found = regressions(results, baseline, args.tolerance)
+    for target, before, now in found:
+        print('REGRESSION %s: %.1f ms -> %.1f ms' % (target, 1e3 * before, 1e3 * now))
+    return 1 if found else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
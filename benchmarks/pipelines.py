@@ -0,0 +1,122 @@
+import numpy as np
+import scipy.constants as constants
+from scipy.special import xlogy
+from antoine import ANTOINE_URL, get_psat, parse_antoine, store as antoine_store
+from bubbledew import bubble_T
+from columndesign import EquilibriumCurve, McCabeThiele, min_reflux, sweep
+from components import get_registry
+from density import DENSITY_URL, parse_dippr105
+from equilibrium import activity_coefficients, light_first
+from fetch import get_text
+from plots import mccabeThielePlot, modelPlots, uniquacPlots
+from vledata import fetch_page, isobaric_datasets, isothermal_datasets, page_order, parse_datasets
+from volume import get_volume
+import models.leaderboard
+from models.uniquac import UNIQUAC
+
+# The work behind each page, without Streamlit, as generators that yield the name of the stage
+# they are about to run; the harness times the stretch between two yields. Every pipeline starts
+# from the network (the stand-in server) and ends with the rendered chart bytes.
+
+N_MODEL = 50
+N_BUBBLE = 200
+SWEEP_R = np.linspace(1.05, 4, 200)
+SWEEP_Q = [0, 0.5, 1, 1.5]
+
+
+def fetch(c1, c2, densities=False):
+    url, html = fetch_page(c1, c2)
+    constants_pages = {c: get_text(ANTOINE_URL + c) for c in (c1, c2)}
+    density_pages = {c: get_text(DENSITY_URL + c) for c in (c1, c2)} if densities else {}
+    return page_order(url, c1, c2), html, constants_pages, density_pages
+
+
+def parse(pages):
+    # the parsed constants go where the stores keep them, as after a first fetch
+    pair, html, constants_pages, density_pages = pages
+    registry = get_registry()
+    for c, page in constants_pages.items():
+        registry.set_antoine(registry.id(c), parse_antoine(page))
+    for c, page in density_pages.items():
+        registry.set_dippr(registry.id(c), parse_dippr105(page))
+    return parse_datasets(html, pair)
+
+
+def isothermal(c1, c2, model):
+    yield 'fetch'
+    pages = fetch(c1, c2, densities=True)
+    yield 'parse'
+    data = isothermal_datasets(parse(pages))[0].interior()
+
+    yield 'properties'
+    s1, s2, x1, y1 = light_first(data)
+    P, T = data.P, data.condition
+    p1_s, p2_s = get_psat(s1, T), get_psat(s2, T)
+    get_volume(s1, T), get_volume(s2, T)
+    G_e = activity_coefficients(x1, y1, P, p1_s, p2_s, T)[2]
+
+    yield 'fit'
+    x = np.linspace(0, 1, N_MODEL)
+    gamma1, gamma2 = models.leaderboard.MODELS[model](x1, G_e, T, s1, s2, x)[1:]
+
+    yield 'bubble'
+    P_model = x * p1_s * gamma1 + (1 - x) * p2_s * gamma2
+    y_model = x * p1_s * gamma1 / P_model
+    Ge_model = constants.R * T * (xlogy(x, gamma1) + xlogy(1 - x, gamma2))
+
+    yield 'render'
+    modelPlots(x1, y1, P, G_e, x, Ge_model, P_model, y_model, x * p1_s + (1 - x) * p2_s, model)
+
+
+def isobaric(c1, c2):
+    yield 'fetch'
+    pages = fetch(c1, c2)
+    yield 'parse'
+    data = isobaric_datasets(parse(pages))[0].interior()
+
+    yield 'properties'
+    s1, s2, x1, y1 = light_first(data)
+    T, P = data.T, data.condition
+    gamma1 = P * y1 / (x1 * get_psat(s1, T))
+    gamma2 = P * (1 - y1) / ((1 - x1) * get_psat(s2, T))
+
+    yield 'fit'
+    uniquac = UNIQUAC(s1, s2)
+    A, B = uniquac.get_parameter([x1, T], np.concatenate((gamma1, gamma2)))['x']
+
+    yield 'bubble'
+    x = np.linspace(0.001, 0.999, N_BUBBLE)
+    T_pred, y_pred, report = bubble_T(x, P, antoine_store.vapor_pressure(s1), antoine_store.vapor_pressure(s2),
+                                      uniquac.activity(A, B))
+    gamma1_pred, gamma2_pred = uniquac.gamma1([x, T_pred], A, B), uniquac.gamma2([x, T_pred], A, B)
+
+    yield 'render'
+    uniquacPlots(x1, y1, T, gamma1, gamma2, x, T_pred, y_pred, gamma1_pred, gamma2_pred)
+
+
+def mccabe_thiele(c1, c2):
+    # the raw isothermal data as the equilibrium curve, one design and a reflux/feed-condition sweep
+    yield 'fetch'
+    pages = fetch(c1, c2)
+    yield 'parse'
+    data = isothermal_datasets(parse(pages))[0]
+
+    yield 'properties'
+    curve = EquilibriumCurve(*light_first(data)[2:])
+
+    yield 'design'
+    Rmin = min_reflux(0.4, 0.9, 0.05, 1, curve)[0]
+    design = McCabeThiele(curve).design(100, 0.4, 0.9, 0.05, 1.5 * Rmin, 1)
+    sweep(100, 0.4, 0.9, 0.05, SWEEP_R, SWEEP_Q, curve)
+
+    yield 'render'
+    mccabeThielePlot(design, curve.xs, curve.ys)
+
+
+def pipelines(c1, c2):
+    # {name: a function starting a fresh run}
+    found = {'isothermal/%s' % model: lambda model=model: isothermal(c1, c2, model)
+             for model in models.leaderboard.MODELS}
+    found['isobaric/UNIQUAC'] = lambda: isobaric(c1, c2)
+    found['mccabe-thiele'] = lambda: mccabe_thiele(c1, c2)
+    return found
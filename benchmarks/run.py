@@ -0,0 +1,162 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import warnings
+from standin import serve
+
+# End-to-end benchmarks of the page pipelines (benchmarks/pipelines.py), run from the repository
+# root as `python -m benchmarks.run`. Every run answers the fetches from a local stand-in server
+# with the synthetic fixtures of benchmarks/fixtures.py (or recorded ones with --fixtures), starts
+# from empty caches and reports the median wall and CPU time and the peak traced memory of every
+# stage. With --baseline the run fails if a stage got slower or bigger than the tolerance allows.
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+METRICS = ('wall', 'cpu', 'peak')
+# differences below these are noise, whatever the relative change
+SLACK = {'wall': 0.005, 'cpu': 0.005, 'peak': 2 ** 20}
+
+
+def start(fixtures_dir):
+    # the stand-in and the environment the app modules read when they are imported
+    server = serve(fixtures_dir, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    scratch = tempfile.mkdtemp(prefix='vle-bench-')
+    os.environ['VLE_STANDIN'] = 'http://127.0.0.1:%d' % server.server_address[1]
+    os.environ['VLE_CACHE_DIR'] = os.path.join(scratch, 'cache')
+    os.environ['VLE_STORE'] = os.path.join(scratch, 'no-store.npz')
+    os.environ.pop('VLE_RECORD', None)
+    os.environ.pop('VLE_OFFLINE', None)
+    return server
+
+
+def reset():
+    # nothing memoized, on disk or in the stores: every run does the full work
+    import components
+    import memo
+    import vledata
+    memo.clear_all()
+    vledata.pages.clear()
+    vledata.datasets.clear()
+    components.reset()
+
+
+def run_once(pipeline, trace=False):
+    # {stage: {metric: value}}; peak memory only when tracing, as tracing slows everything down
+    stages = {}
+    run = pipeline()
+    name = next(run)
+    while name is not None:
+        if trace:
+            tracemalloc.start()
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            following = next(run)
+        except StopIteration:
+            following = None
+        stages[name] = {'wall': time.perf_counter() - wall, 'cpu': time.process_time() - cpu}
+        if trace:
+            stages[name]['peak'] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        name = following
+    return stages
+
+
+def measure(pipeline, repeat):
+    runs = []
+    for _ in range(repeat):
+        reset()
+        runs.append(run_once(pipeline))
+    reset()
+    peaks = run_once(pipeline, trace=True)
+    stages = {name: {'wall': statistics.median(run[name]['wall'] for run in runs),
+                     'cpu': statistics.median(run[name]['cpu'] for run in runs),
+                     'peak': peaks[name]['peak']} for name in runs[0]}
+    stages['total'] = {'wall': statistics.median(sum(s['wall'] for s in run.values()) for run in runs),
+                       'cpu': statistics.median(sum(s['cpu'] for s in run.values()) for run in runs),
+                       'peak': max(s['peak'] for s in peaks.values())}
+    return stages
+
+
+def regressions(results, baseline, tolerance):
+    found = []
+    for pipeline, stages in results.items():
+        for stage, metrics in stages.items():
+            before = baseline.get(pipeline, {}).get(stage)
+            if before is None:
+                continue
+            for metric in METRICS:
+                limit = max(before[metric] * (1 + tolerance), before[metric] + SLACK[metric])
+                if metrics[metric] > limit:
+                    found.append((pipeline, stage, metric, before[metric], metrics[metric]))
+    return found
+
+
+def report(results, baseline, log=print):
+    log('%-28s %-11s %10s %10s %10s %8s' % ('pipeline', 'stage', 'wall ms', 'cpu ms', 'peak KiB', 'vs base'))
+    for pipeline, stages in results.items():
+        for stage, metrics in stages.items():
+            before = baseline.get(pipeline, {}).get(stage)
+            change = '%+.0f%%' % (100 * (metrics['wall'] / before['wall'] - 1)) if before and before['wall'] else ''
+            log('%-28s %-11s %10.1f %10.1f %10.0f %8s' % (pipeline, stage, 1e3 * metrics['wall'],
+                                                          1e3 * metrics['cpu'], metrics['peak'] / 1024, change))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the page pipelines end to end.')
+    parser.add_argument('--repeat', type=int, default=5, help='timed runs per pipeline, the median is reported')
+    parser.add_argument('--only', nargs='*', default=None, help='pipelines whose name starts with one of these')
+    parser.add_argument('--pair', nargs=2, default=None, metavar=('C1', 'C2'),
+                        help='compounds to run (default: the synthetic acetone/water pair)')
+    parser.add_argument('--fixtures', default=None, help='recorded fixtures (standin.py record) instead')
+    parser.add_argument('--baseline', default=BASELINE, help='compare with, and --save-baseline writes, this file')
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed relative increase of any metric')
+    parser.add_argument('--json', default=None, help='also write the results here')
+    args = parser.parse_args(argv)
+    # the models divide by zero at the pure-component ends, as on the pages
+    warnings.simplefilter('ignore', RuntimeWarning)
+
+    fixtures_dir = args.fixtures or tempfile.mkdtemp(prefix='vle-fixtures-')
+    server = start(fixtures_dir)
+    from benchmarks import fixtures
+    from benchmarks.pipelines import pipelines
+    if args.fixtures is None:
+        fixtures.build(fixtures_dir)
+    c1, c2 = args.pair or (fixtures.C1, fixtures.C2)
+
+    results = {}
+    for name, pipeline in pipelines(c1, c2).items():
+        if args.only is None or any(name.startswith(prefix) for prefix in args.only):
+            results[name] = measure(pipeline, args.repeat)
+    server.shutdown()
+
+    baseline = {}
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)['pipelines']
+    report(results, baseline)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'pipelines': results}, f, indent=1)
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump({'python': platform.python_version(), 'machine': platform.machine(), 'repeat': args.repeat,
+                       'pipelines': results}, f, indent=1)
+        print('Baseline written to %s' % args.baseline)
+        return 0
+
+    found = regressions(results, baseline, args.tolerance)
+    for pipeline, stage, metric, before, now in found:
+        print('REGRESSION %s %s %s: %.4g -> %.4g' % (pipeline, stage, metric, before, now))
+    return 1 if found else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
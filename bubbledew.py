@@ -0,0 +1,191 @@
+import collections
+import numpy as np
+import metrics
+
+# Vectorized bubble/dew point calculations for a binary mixture (modified Raoult's law).
+#
+# psat1, psat2: T -> (psat in kPa, dln(psat)/dT), e.g. antoine.store.vapor_pressure(s)
+# activity:     (x1, T) -> (ln γ1, ln γ2, ∂ln γ1/∂T, ∂ln γ2/∂T), None for an ideal liquid
+#
+# Every solver returns (T or P, the other phase composition, SolverReport) with one entry per point;
+# where a point did not converge its T or P and composition are nan.
+
+SolverReport = collections.namedtuple('SolverReport', ['converged', 'iterations', 'residual'])
+
+T_LOW, T_HIGH = 250.0, 500.0  # initial bracket for pure-component boiling points, widened as needed
+
+
+def ideal(x, T):
+    zero = np.zeros(np.broadcast(x, T).shape)
+    return zero, zero, zero, zero
+
+
+def _bracket(f, lo, hi, maxiter=20):
+    # widen [lo, hi] until f(lo) < 0 < f(hi) for every point, f increasing in T
+    for _ in range(maxiter):
+        f_lo, f_hi = f(lo)[0], f(hi)[0]
+        low_bad = ~(f_lo < 0)
+        high_bad = ~(f_hi > 0)
+        if not (low_bad.any() or high_bad.any()):
+            break
+        width = hi - lo
+        lo = np.where(low_bad, np.maximum(lo - width, 0.5 * lo), lo)
+        hi = np.where(high_bad, hi + width, hi)
+    return lo, hi
+
+
+@metrics.timed('newton')
+def _solve_T(f, T0, lo, hi, tol, maxiter):
+    # Newton steps on f(T) -> (F, dF/dT) with F increasing in T, falling back to bisection
+    # whenever a step leaves the current bracket, so no point can diverge
+    T = np.clip(T0, lo, hi)
+    iterations = np.zeros(T.shape, dtype=int)
+    converged = np.zeros(T.shape, dtype=bool)
+    for _ in range(maxiter):
+        F, dF = f(T)
+        converged |= (np.abs(F) < tol) | (hi - lo < tol * T)
+        active = ~converged
+        if not active.any():
+            break
+        iterations += active
+        lo = np.where(active & (F < 0), T, lo)
+        hi = np.where(active & (F > 0), T, hi)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            step = T - F / dF
+        bad = ~np.isfinite(step) | (step <= lo) | (step >= hi)
+        T = np.where(active, np.where(bad, 0.5 * (lo + hi), step), T)
+    F = f(T)[0]
+    converged |= np.abs(F) < tol
+    metrics.observe('newton_iterations', int(iterations.max(initial=0)))
+    return T, SolverReport(converged, iterations, np.abs(F))
+
+
+def saturation_T(psat, P, tol=1e-10, maxiter=50):
+    P = np.asarray(P, dtype=float)
+
+    def f(T):
+        p, dlnp = psat(T)
+        return np.log(p) - np.log(P), dlnp
+
+    lo, hi = _bracket(f, np.full(P.shape, T_LOW), np.full(P.shape, T_HIGH))
+    return _solve_T(f, 0.5 * (lo + hi), lo, hi, tol, maxiter)[0]
+
+
+def _unconverged_nan(report, *values):
+    # points that did not converge are nan, not whatever the last iterate was
+    return tuple(np.where(report.converged, value, np.nan) for value in values) + (report,)
+
+
+def bubble_P(x, T, psat1, psat2, activity=None):
+    x, T = np.broadcast_arrays(np.asarray(x, dtype=float), np.asarray(T, dtype=float))
+    ln_g1, ln_g2 = (activity or ideal)(x, T)[:2]
+    k1 = x * np.exp(ln_g1) * psat1(T)[0]
+    k2 = (1 - x) * np.exp(ln_g2) * psat2(T)[0]
+    P = k1 + k2
+    converged = np.isfinite(P)
+    return P, k1 / P, SolverReport(converged, np.zeros(P.shape, dtype=int), np.zeros(P.shape))
+
+
+def bubble_T(x, P, psat1, psat2, activity=None, T_guess=None, tol=1e-10, maxiter=50):
+    x, P = np.broadcast_arrays(np.asarray(x, dtype=float), np.asarray(P, dtype=float))
+    activity = activity or ideal
+
+    def f(T):
+        # ln(Σ x_i γ_i p_i) - ln P and its analytic T derivative
+        ln_g1, ln_g2, d1, d2 = activity(x, T)
+        p1, dlnp1 = psat1(T)
+        p2, dlnp2 = psat2(T)
+        k1 = x * np.exp(ln_g1) * p1
+        k2 = (1 - x) * np.exp(ln_g2) * p2
+        total = k1 + k2
+        return np.log(total) - np.log(P), (k1 * (d1 + dlnp1) + k2 * (d2 + dlnp2)) / total
+
+    Tb1, Tb2 = saturation_T(psat1, P), saturation_T(psat2, P)
+    if T_guess is None:
+        T_guess = x * Tb1 + (1 - x) * Tb2
+    # azeotropes can boil outside the pure-component range, _bracket widens it where needed
+    lo, hi = _bracket(f, np.minimum(Tb1, Tb2) - 10, np.maximum(Tb1, Tb2) + 10)
+    T, report = _solve_T(f, np.asarray(T_guess, dtype=float), lo, hi, tol, maxiter)
+    ln_g1 = activity(x, T)[0]
+    return _unconverged_nan(report, T, x * np.exp(ln_g1) * psat1(T)[0] / P)
+
+
+@metrics.timed('wegstein')
+def _solve_x(g, x, tol, maxiter):
+    # the liquid composition of a dew point, x = g(x) with g(x) -> (x', T or P). Secant (Wegstein)
+    # steps on h(x) = g(x) - x; h(0) >= 0 >= h(1), so [lo, hi] always brackets a root and a step
+    # that leaves it is replaced by bisection, however non-ideal the liquid
+    lo, hi = np.zeros(x.shape), np.ones(x.shape)
+    g_x, other = g(x)
+    h = g_x - x
+    x_prev = h_prev = None
+    iterations = np.zeros(x.shape, dtype=int)
+    converged = np.zeros(x.shape, dtype=bool)
+    for _ in range(maxiter):
+        converged |= (np.abs(h) < tol) | (hi - lo < tol)
+        active = ~converged
+        if not active.any():
+            break
+        iterations += active
+        lo = np.where(active & (h > 0), x, lo)
+        hi = np.where(active & (h < 0), x, hi)
+        if x_prev is None:
+            step = g_x
+        else:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                step = x - h * (x - x_prev) / (h - h_prev)
+        bad = ~np.isfinite(step) | (step <= lo) | (step >= hi)
+        x_prev, h_prev = x, h
+        x = np.where(active, np.where(bad, 0.5 * (lo + hi), step), x)
+        g_x, other = g(x)
+        h = g_x - x
+    converged |= np.abs(h) < tol
+    metrics.observe('wegstein_iterations', int(iterations.max(initial=0)))
+    return g_x, other, SolverReport(converged, iterations, np.abs(h))
+
+
+def dew_P(y, T, psat1, psat2, activity=None, tol=1e-10, maxiter=100):
+    # P is explicit for a given x, so only x is iterated
+    y, T = np.broadcast_arrays(np.asarray(y, dtype=float), np.asarray(T, dtype=float))
+    activity = activity or ideal
+    p1, p2 = psat1(T)[0], psat2(T)[0]
+
+    def g(x):
+        ln_g1, ln_g2 = activity(x, T)[:2]
+        w1 = y / (np.exp(ln_g1) * p1)
+        w2 = (1 - y) / (np.exp(ln_g2) * p2)
+        return w1 / (w1 + w2), 1 / (w1 + w2)
+
+    x, P, report = _solve_x(g, y.copy(), tol, maxiter)
+    return _unconverged_nan(report, P, x)
+
+
+def dew_T(y, P, psat1, psat2, activity=None, tol=1e-10, xtol=1e-10, maxiter=50, outer=100):
+    # x iterated as in dew_P, each g(x) a bracketed Newton solve for T at that x
+    y, P = np.broadcast_arrays(np.asarray(y, dtype=float), np.asarray(P, dtype=float))
+    activity = activity or ideal
+    Tb1, Tb2 = saturation_T(psat1, P), saturation_T(psat2, P)
+    state = {'T': y * Tb1 + (1 - y) * Tb2, 'converged': np.ones(y.shape, dtype=bool)}
+
+    def g(x):
+        def f(T):
+            # -ln(Σ y_i / (γ_i p_i)) - ln P, increasing in T
+            ln_g1, ln_g2, d1, d2 = activity(x, T)
+            p1, dlnp1 = psat1(T)
+            p2, dlnp2 = psat2(T)
+            w1 = y / (np.exp(ln_g1) * p1)
+            w2 = (1 - y) / (np.exp(ln_g2) * p2)
+            total = w1 + w2
+            return -np.log(total) - np.log(P), (w1 * (d1 + dlnp1) + w2 * (d2 + dlnp2)) / total
+
+        lo, hi = _bracket(f, np.minimum(Tb1, Tb2) - 10, np.maximum(Tb1, Tb2) + 10)
+        T, inner = _solve_T(f, state['T'], lo, hi, tol, maxiter)
+        state['T'], state['converged'] = T, inner.converged
+        ln_g1, ln_g2 = activity(x, T)[:2]
+        w1 = y / (np.exp(ln_g1) * psat1(T)[0])
+        w2 = (1 - y) / (np.exp(ln_g2) * psat2(T)[0])
+        return w1 / (w1 + w2), T
+
+    x, T, report = _solve_x(g, y.copy(), xtol, outer)
+    report = report._replace(converged=report.converged & state['converged'])
+    return _unconverged_nan(report, T, x)
@@ -0,0 +1,197 @@
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+import time
+import zlib
+import metrics
+
+CACHE_DIR = os.environ.get('VLE_CACHE_DIR',
+                           os.path.join(os.path.dirname(os.path.abspath(__file__)), '.vle_cache'))
+# for the whole cache directory, all namespaces together
+CACHE_MAX_BYTES = int(os.environ.get('VLE_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+# an eviction goes down to this fraction of the limit, so the writes right after it don't evict again
+EVICT_TO = 0.9
+
+# never touch the network, serve everything from the disk cache (or derive it from what is cached)
+OFFLINE = os.environ.get('VLE_OFFLINE', '0') not in ('', '0', 'false', 'False')
+
+
+class OfflineError(LookupError):
+    pass
+
+
+def set_offline(offline=True):
+    global OFFLINE
+    OFFLINE = offline
+
+
+def is_offline():
+    return OFFLINE
+
+
+# {cache directory: bytes in it}, counted on first use and kept up to date by the writes and removals
+# of this process; every eviction counts again, which picks up what other processes wrote
+_usage = {}
+_usage_lock = threading.Lock()
+
+
+def key_digest(key):
+    return hashlib.sha256(repr(key).encode('utf-8')).hexdigest()
+
+
+class DiskCache:
+    # Entries live in <directory>/<namespace>/<sha256(key)[:2]>/<sha256(key)>, zlib-compressed pickles of
+    # (key, stored_at, sha256(payload), payload). Once the entries of all namespaces under <directory> add up to
+    # more than max_bytes, the least recently read ones are dropped, whichever namespace they are in.
+    def __init__(self, namespace, directory=None, ttl=None, max_bytes=None):
+        self.namespace = namespace
+        self.root = directory or CACHE_DIR
+        self.directory = os.path.join(self.root, namespace)
+        self.ttl = ttl  # seconds, None never expires
+        self.max_bytes = CACHE_MAX_BYTES if max_bytes is None else max_bytes
+
+    def _path(self, key):
+        digest = key_digest(key)
+        return os.path.join(self.directory, digest[:2], digest)
+
+    def _read(self, path):
+        with open(path, 'rb') as f:
+            stored_key, stored_at, checksum, payload = pickle.loads(zlib.decompress(f.read()))
+        if hashlib.sha256(payload).hexdigest() != checksum:
+            raise ValueError('corrupt cache entry %s' % path)
+        return stored_key, stored_at, payload
+
+    def get(self, key, default=None):
+        path = self._path(key)
+        try:
+            stored_key, stored_at, payload = self._read(path)
+        except FileNotFoundError:
+            return default
+        except Exception:
+            self._remove(path)
+            return default
+        if stored_key != key:
+            return default
+        if self.ttl is not None and time.time() - stored_at > self.ttl and not OFFLINE:
+            self._remove(path)
+            return default
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return pickle.loads(payload)
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING) is not _MISSING
+
+    def set(self, key, value):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        blob = zlib.compress(pickle.dumps((key, time.time(), hashlib.sha256(payload).hexdigest(), payload)))
+        try:
+            replaced = os.stat(path).st_size
+        except OSError:
+            replaced = 0
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(blob)
+            os.replace(tmp, path)
+        except Exception:
+            _discard(tmp)
+            raise
+        self._count(len(blob) - replaced)
+        if self.usage() > self.max_bytes:
+            self.evict()
+
+    def get_or_fetch(self, key, fetch):
+        value = self.get(key, _MISSING)
+        metrics.inc('disk_cache', namespace=self.namespace, result='miss' if value is _MISSING else 'hit')
+        if value is not _MISSING:
+            return value
+        # offline, fetch still runs: entries derived from other cached ones (datasets parsed from a
+        # cached page) are rebuilt, only requests to the network raise OfflineError (fetch.get)
+        value = fetch()
+        self.set(key, value)
+        return value
+
+    def _entries(self, directory=None):
+        for root, _, files in os.walk(directory or self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                yield path, st.st_size, st.st_mtime
+
+    def size(self):
+        # of this namespace
+        return sum(size for _, size, _ in self._entries())
+
+    def usage(self):
+        # bytes of the whole cache directory
+        with _usage_lock:
+            if self.root not in _usage:
+                _usage[self.root] = sum(size for _, size, _ in self._entries(self.root))
+            return _usage[self.root]
+
+    def _count(self, delta):
+        with _usage_lock:
+            if self.root in _usage:
+                _usage[self.root] += delta
+
+    def evict(self):
+        with _usage_lock:
+            entries = list(self._entries(self.root))
+            total = sum(size for _, size, _ in entries)
+            removed = 0
+            if total > self.max_bytes:
+                for path, size, _ in sorted(entries, key=lambda e: e[2]):
+                    if total <= self.max_bytes * EVICT_TO:
+                        break
+                    if _discard(path):
+                        total -= size
+                        removed += 1
+            _usage[self.root] = total
+        return removed
+
+    def expire(self):
+        if self.ttl is None:
+            return 0
+        removed = 0
+        for path, _, _ in list(self._entries()):
+            try:
+                _, stored_at, _ = self._read(path)
+            except Exception:
+                stored_at = 0
+            if time.time() - stored_at > self.ttl:
+                self._remove(path)
+                removed += 1
+        return removed
+
+    def clear(self):
+        for path, _, _ in list(self._entries()):
+            self._remove(path)
+
+    def _remove(self, path):
+        try:
+            size = os.stat(path).st_size
+        except OSError:
+            return
+        if _discard(path):
+            self._count(-size)
+
+
+def _discard(path):
+    try:
+        os.remove(path)
+        return True
+    except OSError:
+        return False
+
+
+_MISSING = object()
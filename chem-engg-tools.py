@@ -1,15 +1,25 @@
+from importlib import import_module
 import streamlit as st
 import numpy as np
-import lxml
-import home, mccabethiele, correlations, isobaric
+import metrics
 
 np.seterr(divide='ignore', invalid='ignore')
 
-PAGES = {"Home": home, "Isobaric Data": isobaric, "Isothermal Data": correlations, "McCabe-Thiele Plots": mccabethiele}
+# page modules by name, imported on first navigation so a cold start only loads what Home needs
+PAGES = {"Home": "home", "Isobaric Data": "isobaric", "Isothermal Data": "correlations",
+         "McCabe-Thiele Plots": "mccabethiele"}
 
 st.sidebar.title("Navigation")
 selection = st.sidebar.radio("Go to", ["Home", "Isobaric Data", "Isothermal Data", "McCabe-Thiele Plots"])
 
+# Prometheus /metrics next to the app when VLE_METRICS_PORT is set
+metrics.serve_in_background()
+
 with st.spinner(f'Loading {selection} ...'):
-    PAGES[selection].main()
+    with metrics.collect(selection) as record:
+        import_module(PAGES[selection]).main()
+
+if record is not None:
+    st.sidebar.title("Timings")
+    st.sidebar.text(metrics.summary(record))
 
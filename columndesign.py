@@ -0,0 +1,275 @@
+import numpy as np
+import pandas as pd
+
+# McCabe-Thiele column design without any plotting. Every function works elementwise on
+# broadcastable arrays, so one design and a batch of designs go through the same code.
+# Wherever a relative volatility alpha is taken, an EquilibriumCurve can be given instead.
+
+MAX_STAGES = 99
+
+
+class EquilibriumCurve:
+    # y-x curve of the light component tabulated once on a fine grid from scattered points
+    # (data or a fitted model). The points are made monotone and interpolated with PCHIP, so
+    # y(x) and its inverse x(y) are both table lookups (a binary search each).
+    def __init__(self, x, y, n=2001):
+        from scipy.interpolate import PchipInterpolator
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        keep = np.isfinite(x) & np.isfinite(y) & (x > 0) & (x < 1)
+        order = np.argsort(x[keep])
+        x = np.concatenate(([0.0], x[keep][order], [1.0]))
+        y = np.concatenate(([0.0], np.clip(y[keep][order], 0, 1), [1.0]))
+        x, first = np.unique(x, return_index=True)
+        y = np.maximum.accumulate(y[first])
+        self.xs = np.linspace(0, 1, n)
+        self.ys = np.maximum.accumulate(np.clip(PchipInterpolator(x, y)(self.xs), 0, 1))
+
+    @classmethod
+    def from_alpha(cls, alpha, n=2001):
+        x = np.linspace(0, 1, n)
+        return cls(x, y_eq(x, alpha), n)
+
+    def y(self, x):
+        return np.interp(x, self.xs, self.ys)
+
+    def x(self, y):
+        return np.interp(y, self.ys, self.xs)
+
+
+def y_eq(x, alpha):
+    if isinstance(alpha, EquilibriumCurve):
+        return alpha.y(x)
+    return alpha * x / (1 + (alpha - 1) * x)
+
+
+def x_eq(y, alpha):
+    # liquid in equilibrium with vapour y at constant relative volatility, or on the curve
+    if isinstance(alpha, EquilibriumCurve):
+        return alpha.x(y)
+    return y / (alpha - (alpha - 1) * y)
+
+
+def flows(F, zf, xd, xb, R, q):
+    # distillate, bottoms and the liquid/vapour flows of both sections from the overall balances
+    D = F * (zf - xb) / (xd - xb)
+    B = F - D
+    Lr = R * D
+    Vr = Lr + D
+    Ls = Lr + q * F
+    Vs = Vr + (q - 1) * F
+    return D, B, Lr, Vr, Ls, Vs
+
+
+def operating_lines(F, zf, xd, xb, R, q):
+    # (slope, intercept) of the rectifying and the stripping section operating lines; the stripping
+    # line is nan where no vapour rises through that section (Vs <= 0, a vapour feed below Rmin)
+    D, B, Lr, Vr, Ls, Vs = flows(F, zf, xd, xb, R, q)
+    Vs = np.where(Vs > 0, Vs, np.nan)
+    return (Lr / Vr, D * xd / Vr), (Ls / Vs, -B * xb / Vs)
+
+
+def above_min_reflux(R, Rmin, rectifying):
+    # the rectifying line, nan where R <= Rmin: such a column never reaches the specification,
+    # however many stages it has, and step_stages reports it as inf
+    feasible = np.asarray(R) > np.asarray(Rmin)
+    return tuple(np.where(feasible, v, np.nan) for v in rectifying)
+
+
+def q_intersection(zf, xd, R, q):
+    # where the rectifying line y = R/(R+1) x + xd/(R+1) meets the q-line q x - (q-1) y = zf
+    slope, intercept = R / (R + 1), xd / (R + 1)
+    xq = (zf + (q - 1) * intercept) / (q - (q - 1) * slope)
+    return xq, slope * xq + intercept
+
+
+def q_line_on_table(zf, q, curve):
+    # first grid point where q x - (q-1) y(x) - zf changes sign, refined linearly between the two
+    # grid points around it; the function is -zf at x = 0 and 1 - zf at x = 1
+    zf, q = np.broadcast_arrays(np.asarray(zf, dtype=float), np.asarray(q, dtype=float))
+    g = q[..., None] * curve.xs - (q - 1)[..., None] * curve.ys - zf[..., None]
+    i = np.clip(np.argmax(g >= 0, axis=-1), 1, len(curve.xs) - 1)
+    g0 = np.take_along_axis(g, i[..., None] - 1, -1)[..., 0]
+    g1 = np.take_along_axis(g, i[..., None], -1)[..., 0]
+    x = curve.xs[i - 1] + (curve.xs[i] - curve.xs[i - 1]) * g0 / (g0 - g1)
+    return x, curve.y(x)
+
+
+def q_line_on_curve(zf, q, alpha):
+    if isinstance(alpha, EquilibriumCurve):
+        return q_line_on_table(zf, q, alpha)
+    # the q-line meets y = αx / (1 + (α-1)x) where q(α-1)x² + (q - zf(α-1) - α(q-1))x - zf = 0
+    zf, q, alpha = (np.asarray(v, dtype=float) for v in (zf, q, alpha))
+    a = q * (alpha - 1)
+    b = q - zf * (alpha - 1) - alpha * (q - 1)
+    c = -zf
+    with np.errstate(divide='ignore', invalid='ignore'):
+        root = np.sqrt(b ** 2 - 4 * a * c)
+        x1 = (-b + root) / (2 * a)
+        x2 = (-b - root) / (2 * a)
+        linear = -c / b
+    x = np.where(a == 0, linear, np.where((x1 >= 0) & (x1 <= 1), x1, x2))
+    return x, y_eq(x, alpha)
+
+
+def tangent_pinch(zf, xd, xb, q, curve, chunk=2 ** 21):
+    # Minimum reflux on a tabulated curve, which may pinch away from the feed (ethanol-water near the
+    # top). Every table point is a candidate: the rectifying line from (xd, xd) must clear the curve
+    # between the feed pinch and xd, so its slope is the largest over those points, and the stripping
+    # line from (xb, xb) must clear it between xb and the feed pinch, so its slope is the smallest.
+    # The stripping limit is carried to the q-line and turned into a reflux ratio; whichever section
+    # needs the higher reflux controls. Designs are scanned in chunks of at most chunk table entries.
+    zf, xd, xb, q = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (zf, xd, xb, q)))
+    shape = zf.shape
+    zf, xd, xb, q = (v.ravel() for v in (zf, xd, xb, q))
+    xf, yf = q_line_on_table(zf, q, curve)
+    X, Y = curve.xs, curve.ys
+    Rmin, x_pinch, y_pinch = np.empty_like(zf), np.empty_like(zf), np.empty_like(zf)
+    step = max(1, chunk // len(X))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for start in range(0, len(zf), step):
+            b = slice(start, start + step)
+            rows = np.arange(len(zf[b]))
+            d, w, fx, fy = xd[b, None], xb[b, None], xf[b, None], yf[b, None]
+
+            rectifying = np.where((X > fx) & (X < d), (d - Y) / (d - X), -np.inf)
+            i = np.argmax(rectifying, axis=1)
+            tangent = rectifying[rows, i] > (xd[b] - yf[b]) / (xd[b] - xf[b])
+            xr, yr = np.where(tangent, X[i], xf[b]), np.where(tangent, Y[i], yf[b])
+            slope = (xd[b] - yr) / (xd[b] - xr)
+            R_rectifying = slope / (1 - slope)
+
+            stripping = np.where((X > w) & (X < fx), (Y - w) / (X - w), np.inf)
+            j = np.argmin(stripping, axis=1)
+            tangent = stripping[rows, j] < (yf[b] - xb[b]) / (xf[b] - xb[b])
+            xs, ys = np.where(tangent, X[j], xf[b]), np.where(tangent, Y[j], yf[b])
+            m = (ys - xb[b]) / (xs - xb[b])
+            # the limiting stripping line y = xb + m (x - xb) meets the q-line here
+            x_q = (zf[b] + (q[b] - 1) * xb[b] * (1 - m)) / (q[b] - (q[b] - 1) * m)
+            y_q = xb[b] + m * (x_q - xb[b])
+            slope = (xd[b] - y_q) / (xd[b] - x_q)
+            R_stripping = slope / (1 - slope)
+
+            stripping_controls = R_stripping > R_rectifying
+            Rmin[b] = np.where(stripping_controls, R_stripping, R_rectifying)
+            x_pinch[b] = np.where(stripping_controls, xs, xr)
+            y_pinch[b] = np.where(stripping_controls, ys, yr)
+    return Rmin.reshape(shape), x_pinch.reshape(shape), y_pinch.reshape(shape)
+
+
+def min_reflux(zf, xd, xb, q, alpha):
+    # Rmin and the controlling pinch point; at constant relative volatility the curve has no
+    # inflection, so the rectifying line through (xd, xd) pinches where the q-line meets it
+    if isinstance(alpha, EquilibriumCurve):
+        return tangent_pinch(zf, xd, xb, q, alpha)
+    x, y = q_line_on_curve(zf, q, alpha)
+    slope = (xd - y) / (xd - x)
+    return slope / (1 - slope), x, y
+
+
+def step_stages(xd, xb, xq, rectifying, stripping, alpha, max_stages=MAX_STAGES, trace=True):
+    # Step off stages from the top for every design at once. x[i], y[i] are the liquid and vapour
+    # leaving stage i + 1 and y_next[i] the vapour rising into it; stages and feed_stage are inf
+    # and 0 where the column needs more than max_stages (the operating line pinches the curve).
+    # Without trace only the counts are kept, which is what large sweeps need.
+    if not isinstance(alpha, EquilibriumCurve):
+        xd, xb, xq, alpha = np.broadcast_arrays(*(np.asarray(a, dtype=float) for a in (xd, xb, xq, alpha)))
+    else:
+        xd, xb, xq = np.broadcast_arrays(*(np.asarray(a, dtype=float) for a in (xd, xb, xq)))
+    (rs, ri), (ss, si) = rectifying, stripping
+    shape = xd.shape
+    rows = max_stages if trace else 0
+    x = np.full((rows,) + shape, np.nan)
+    y = np.full((rows,) + shape, np.nan)
+    y_next = np.full((rows,) + shape, np.nan)
+    stages = np.full(shape, np.inf)
+    feed_stage = np.zeros(shape, dtype=int)
+    done = np.zeros(shape, dtype=bool)
+    y_stage = xd.copy()
+    for i in range(max_stages):
+        active = ~done
+        x_stage = x_eq(y_stage, alpha)
+        rectifying_section = x_stage > xq
+        y_below = np.where(rectifying_section, rs * x_stage + ri, ss * x_stage + si)
+        if trace:
+            x[i] = np.where(active, x_stage, np.nan)
+            y[i] = np.where(active, y_stage, np.nan)
+            y_next[i] = np.where(active, y_below, np.nan)
+        feed_stage = np.where(active & (feed_stage == 0) & ~rectifying_section, i + 1, feed_stage)
+        finished = active & ((y_below < x_stage) | (x_stage < xb))
+        stages = np.where(finished, i + 1, stages)
+        done |= finished
+        if done.all():
+            x, y, y_next = x[:i + 1], y[:i + 1], y_next[:i + 1]
+            break
+        y_stage = np.where(done, y_stage, y_below)
+    # designs that are not distillations at all (xb >= zf, R < 0, ...) never finish either
+    stages = np.where(np.isnan(xq) | np.isnan(rs) | np.isnan(ss), np.inf, stages)
+    feed_stage = np.where(np.isfinite(stages), feed_stage, 0)
+    return {'x': x, 'y': y, 'y_next': y_next, 'stages': stages, 'feed_stage': feed_stage}
+
+
+def staircase(x, y, y_next, xd, xb):
+    # ((x0, y0), (x1, y1)) segments of one design's stage steps, for a single LineCollection
+    n = np.count_nonzero(~np.isnan(x))
+    x, y, y_next = x[:n], y[:n], y_next[:n]
+    x_start = np.concatenate(([xd], x[:-1]))
+    # the last step drops to the diagonal once it has passed the bottoms composition
+    y_end = np.where(x < xb, x, y_next)
+    horizontal = np.stack((np.stack((x_start, y), -1), np.stack((x, y), -1)), 1)
+    vertical = np.stack((np.stack((x, y), -1), np.stack((x, y_end), -1)), 1)
+    return np.stack((horizontal, vertical), 1).reshape(-1, 2, 2)
+
+
+def sweep(F, zf, xd, xb, R, q, alpha, max_stages=MAX_STAGES):
+    # Every combination of the given values (scalars or 1-d arrays) as one flat batch of designs,
+    # stepped together. Returns one row per design; stages is inf where R is at or below Rmin.
+    curve = alpha if isinstance(alpha, EquilibriumCurve) else None
+    values = (F, zf, xd, xb, R, q) + ((alpha,) if curve is None else (np.nan,))
+    grid = np.meshgrid(*(np.atleast_1d(np.asarray(v, dtype=float)) for v in values), indexing='ij')
+    F, zf, xd, xb, R, q, alpha = (g.ravel() for g in grid)
+    alpha_or_curve = alpha if curve is None else curve
+    with np.errstate(divide='ignore', invalid='ignore'):
+        D, B = flows(F, zf, xd, xb, R, q)[:2]
+        xq = q_intersection(zf, xd, R, q)[0]
+        # Rmin does not depend on R or F, so it is found once per distinct (zf, xd, xb, q, alpha)
+        specs = (zf, xd, xb, q) + ((alpha,) if curve is None else ())
+        specs, inverse = np.unique(np.column_stack(specs), axis=0, return_inverse=True)
+        specs = list(specs.T) + ([] if curve is None else [curve])
+        Rmin = min_reflux(*specs)[0][inverse.ravel()]
+        rectifying, stripping = operating_lines(F, zf, xd, xb, R, q)
+        rectifying = above_min_reflux(R, Rmin, rectifying)
+        steps = step_stages(xd, xb, xq, rectifying, stripping, alpha_or_curve, max_stages, trace=False)
+    return pd.DataFrame({'F': F, 'zf': zf, 'xd': xd, 'xb': xb, 'R': R, 'q': q, 'alpha': alpha,
+                         'D': D, 'B': B, 'Rmin': Rmin, 'R/Rmin': R / Rmin,
+                         'stages': steps['stages'], 'feed_stage': steps['feed_stage']})
+
+
+class McCabeThiele:
+    def __init__(self, alpha, max_stages=MAX_STAGES):
+        self.alpha = alpha
+        self.max_stages = max_stages
+
+    def design(self, F, zf, xd, xb, R, q):
+        D, B = flows(F, zf, xd, xb, R, q)[:2]
+        xq, yq = q_intersection(zf, xd, R, q)
+        Rmin, x_pinch, y_pinch = min_reflux(zf, xd, xb, q, self.alpha)
+        with np.errstate(invalid='ignore'):
+            rectifying, stripping = operating_lines(F, zf, xd, xb, R, q)
+        rectifying = above_min_reflux(R, Rmin, rectifying)
+        steps = step_stages(xd, xb, xq, rectifying, stripping, self.alpha, self.max_stages)
+        x, y, y_next = steps['x'], steps['y'], steps['y_next']
+        return {'D': float(D), 'B': float(B), 'xq': float(xq), 'yq': float(yq), 'Rmin': float(Rmin),
+                'pinch': (float(x_pinch), float(y_pinch)), 'stages': float(steps['stages']),
+                'feed_stage': int(steps['feed_stage']), 'x': x, 'y': y, 'y_next': y_next,
+                'staircase': staircase(x, y, y_next, xd, xb), 'xd': xd, 'xb': xb}
+
+    def sweep(self, F, zf, xd, xb, R, q):
+        return sweep(F, zf, xd, xb, R, q, self.alpha, self.max_stages)
+
+    def total_reflux(self, xd, xb):
+        # both operating lines collapse onto the diagonal, the last step ends below xb
+        steps = step_stages(xd, xb, 0.0, (1.0, 0.0), (1.0, 0.0), self.alpha, self.max_stages)
+        x, y, y_next = steps['x'], steps['y'], steps['y_next']
+        return {'stages': float(steps['stages']), 'x': x, 'y': y, 'y_next': y_next,
+                'staircase': staircase(x, y, y_next, xd, xb), 'xd': xd, 'xb': xb}
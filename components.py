@@ -0,0 +1,142 @@
+import os
+import threading
+import numpy as np
+from vlestore import ANTOINE_KEYS, DIPPR_KEYS, STORE_PATH, get_store
+
+# Every component the app knows, under an integer id, with its constants in arrays indexed by
+# that id: molar mass, UNIQUAC r and q, Antoine coefficient sets and DIPPR-105 constants. Molar
+# masses and UNIQUAC parameters come from the tables next to the code, Antoine and DIPPR-105
+# constants from the ingested store when there is one. Whatever the store lacks is fetched by
+# antoine.py and density.py on first use and kept here for the rest of the process.
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+WEIGHTS_PATH = os.path.join(ROOT, 'molecularWeights.txt')
+UNIQUAC_PATH = os.path.join(ROOT, 'uniquac_params.txt')
+
+# every compound with VLE pages at DDBST, url-encoded as in the page names
+COMPOUNDS = ['Acetonitrile', 'Acetone', '1,2-Ethanediol', 'Ethanol',
+             'Diethyl%20ether', 'Ethyl%20acetate', 'Benzene', '1-Butanol',
+             'Chloroform', 'Cyclohexane', 'Acetic%20acid%20butyl%20ester', 'Acetic%20acid',
+             'Hexane', '2-Propanol', '1-Hexene', 'Methanol',
+             'Tetrahydrofuran', 'Water', 'm-Xylene', 'p-Xylene',
+             'N-Methyl-2-pyrrolidone', '1,3-Butadiene', 'Hexadecane']
+
+
+def canonical(name):
+    # the url-encoded name, however the spaces were written (DDBST's DIPPR-105 pages use +)
+    return name.replace(' ', '%20').replace('+', '%20')
+
+
+def display_name(name):
+    return name.replace('%20', ' ')
+
+
+def read_table(path):
+    # {compound: [values]} of a '!'-separated table
+    with open(path) as f:
+        rows = [line.rstrip('\n').split('!') for line in f if line.strip()]
+    return {canonical(row[0]): [float(value) for value in row[1:]] for row in rows}
+
+
+class ComponentRegistry:
+    def __init__(self, names, weights, uniquac):
+        self.names = []
+        self.ids = {}
+        self.mw = np.zeros(0)
+        self.r = np.zeros(0)
+        self.q = np.zeros(0)
+        # the Antoine sets of component i are rows antoine_span[i, 0]:antoine_span[i, 1] of antoine,
+        # columns ANTOINE_KEYS; a span of -1 means they haven't been loaded yet
+        self.antoine = np.zeros((0, len(ANTOINE_KEYS)))
+        self.antoine_span = np.zeros((0, 2), dtype=np.int64)
+        # one row per component, columns DIPPR_KEYS, nan until loaded
+        self.dippr = np.zeros((0, len(DIPPR_KEYS)))
+        self.lock = threading.RLock()
+        self.add(names, weights, uniquac)
+
+    @classmethod
+    def load(cls, store=None, names=COMPOUNDS, weights_path=WEIGHTS_PATH, uniquac_path=UNIQUAC_PATH):
+        registry = cls(names, read_table(weights_path), read_table(uniquac_path))
+        if store is not None:
+            for i, name in enumerate(registry.names):
+                antoine = store.antoine(name)
+                if antoine is not None:
+                    registry.set_antoine(i, antoine)
+                dippr = store.dippr(name.replace('%20', '+'))
+                if dippr is not None:
+                    registry.set_dippr(i, dippr)
+        return registry
+
+    def add(self, names, weights=None, uniquac=None):
+        # new components get the next ids, without constants unless they are given; the only way
+        # a name outside COMPOUNDS gets in
+        weights, uniquac = weights or {}, uniquac or {}
+        with self.lock:
+            names = [name for name in dict.fromkeys(map(canonical, names)) if name not in self.ids]
+            for name in names:
+                self.ids[name] = len(self.names)
+                self.names.append(name)
+            self.mw = np.concatenate((self.mw, [weights.get(name, [np.nan])[0] for name in names]))
+            self.r = np.concatenate((self.r, [uniquac.get(name, [np.nan, np.nan])[0] for name in names]))
+            self.q = np.concatenate((self.q, [uniquac.get(name, [np.nan, np.nan])[1] for name in names]))
+            self.antoine_span = np.concatenate((self.antoine_span, np.full((len(names), 2), -1, dtype=np.int64)))
+            self.dippr = np.concatenate((self.dippr, np.full((len(names), len(DIPPR_KEYS)), np.nan)))
+
+    def id(self, name):
+        i = self.ids.get(canonical(name))
+        if i is None:
+            raise KeyError('unknown component %r' % name)
+        return i
+
+    def __len__(self):
+        return len(self.names)
+
+    def has_antoine(self, i):
+        return self.antoine_span[i, 0] >= 0
+
+    def set_antoine(self, i, params):
+        # the first sets given for a component are kept, concurrent first lookups add no extra rows
+        rows = np.column_stack([np.asarray(params[key], dtype=float) for key in ANTOINE_KEYS])
+        with self.lock:
+            if self.has_antoine(i):
+                return
+            start = len(self.antoine)
+            self.antoine = np.concatenate((self.antoine, rows))
+            self.antoine_span[i] = start, start + len(rows)
+
+    def antoine_sets(self, i):
+        start, end = self.antoine_span[i]
+        return self.antoine[start:end]
+
+    def has_dippr(self, i):
+        return not np.isnan(self.dippr[i, 0])
+
+    def set_dippr(self, i, params):
+        with self.lock:
+            if not self.has_dippr(i):
+                self.dippr[i] = [params[key] for key in DIPPR_KEYS]
+
+    def with_uniquac(self):
+        # the components the UNIQUAC model has r and q for, in id order
+        return [name for name, r in zip(self.names, self.r) if not np.isnan(r)]
+
+
+_registries = {}
+_lock = threading.Lock()
+
+
+def reset():
+    # drop the registries, the next get_registry loads again (after the store changed)
+    with _lock:
+        _registries.clear()
+
+
+def get_registry(store_path=STORE_PATH):
+    # the registry with the constants of the store at store_path, loaded once
+    registry = _registries.get(store_path)
+    if registry is None:
+        with _lock:
+            if store_path not in _registries:
+                _registries[store_path] = ComponentRegistry.load(get_store(store_path))
+            registry = _registries[store_path]
+    return registry
@@ -1,13 +1,11 @@
 import streamlit as st
-import numpy as np
 from matplotlib import style
-import pandas as pd
-import requests
-import scipy.constants as constants
-import scipy.optimize as opt
+from cache import OfflineError
+from components import COMPOUNDS, display_name
+from vledata import link_generator, prefetch, get_datasets
 from antoine import get_psat
-import lxml
 from plots import isobaricPlots, isothermalPlots
+from render import show
 
 
 def main():
@@ -17,18 +15,8 @@ def main():
 
     style.use("classic")
 
-    compounds = ['Acetonitrile', 'Acetone', '1,2-Ethanediol', 'Ethanol',
-                 'Diethyl ether', 'Ethyl acetate', 'Benzene', '1-Butanol',
-                 'Chloroform', 'Cyclohexane', 'Acetic acid butyl ester', 'Acetic acid',
-                 'Hexane', '2-Propanol', '1-Hexene', 'Methanol',
-                 'Tetrahydrofuran', 'Water', 'm-Xylene', 'p-Xylene',
-                 'N-Methyl-2-pyrrolidone', '1,3-Butadiene', 'Hexadecane']
-
-    menu_options = compounds.copy()
-
-    for i, compound in enumerate(compounds):
-        if ' ' in compound:
-            compounds[i] = compound.replace(' ', '%20')
+    compounds = list(COMPOUNDS)
+    menu_options = [display_name(c) for c in compounds]
 
     compound1 = st.selectbox('Select compound 1', menu_options, key='compound1')
     compound2 = st.selectbox('Select compound 2', menu_options, key='compound2')
@@ -38,55 +26,38 @@ def main():
 
     st.info("You have chosen %s and %s" % (compound1, compound2))
 
-    # @st.cache(suppress_st_warning=True)
-    def link_generator(i1, i2):
-        url = 'https://web.archive.org/web/20200220211155/http://www.ddbst.com/en/EED/VLE%20' + compounds[i1] + '%3B' + compounds[i2] + '.php'
-        if requests.get(url).status_code == 404:
-            url = 'https://web.archive.org/web/20200220211155/http://www.ddbst.com/en/EED/VLE%20' + compounds[i2] + '%3B' + compounds[i1] + '.php'
-        return url
-
     try:
         if compound1 == compound2:
             st.warning('Choose different compounds')
         else:
-            url = link_generator(i1, i2)
+            prefetch(compounds[i1], compounds[i2])
+            url = link_generator(compounds[i1], compounds[i2])
 
-        if requests.get(url).status_code == 404:
+        if url is None:
             st.error("VLE data for this pair of compounds doesn't exist at DDBST.")
 
-        dataframes = pd.read_html(url)
-
-        vledata = []
-        S = []
-        for i, data in enumerate(dataframes):
-            col = data.columns
-            if col.dtype == object:
-                if (len(col) == 3 and 'P' in col[0] and 'x1' in col[1] and 'y1' in col[2]) or (
-                        len(col) == 3 and 'T' in col[0] and 'x1' in col[1] and 'y1' in col[2]):
-                    S.append(float(dataframes[i - 1][1]))
-                    vledata.append(dataframes[i])
+        found = get_datasets(compounds[i1], compounds[i2])
 
-        if vledata == []:
+        if found == []:
             st.error('Complete VLE data is not available at DDBST')
         else:
-            for i in range(len(S)):
-                if vledata[i].columns[0] == 'P [kPa]':
-                    st.write('%d)' % (i + 1), 'T = ', S[i], 'K')
-                if vledata[i].columns[0] == 'T [K]':
-                    st.write('%d)' % (i + 1), 'P = ', S[i], 'kPa')
-                st.write(vledata[i])
-            if len(S) == 1:
+            for i, dataset in enumerate(found):
+                if dataset.kind == 'isothermal':
+                    st.write('%d)' % (i + 1), 'T = ', dataset.condition, 'K')
+                else:
+                    st.write('%d)' % (i + 1), 'P = ', dataset.condition, 'kPa')
+                st.write(dataset.to_table())
+            if len(found) == 1:
                 choice = 1
             else:
-                choice = st.number_input('Choose a dataset', value=1, min_value=1, max_value=len(S))
+                choice = st.number_input('Choose a dataset', value=1, min_value=1, max_value=len(found))
 
             st.info('Analysing dataset %d ...' % choice)
 
-            try:
-                P = vledata[choice - 1]['P [kPa]']
-                x1 = vledata[choice - 1]['x1 [mol/mol]']
-                y1 = vledata[choice - 1]['y1 [mol/mol]']
-                T = S[choice - 1]
+            dataset = found[choice - 1]
+            x1, y1 = dataset.x1, dataset.y1
+            if dataset.kind == 'isothermal':
+                P, T = dataset.P, dataset.condition
 
                 st.write(r'$T = %0.2f K$' % T)
 
@@ -102,14 +73,9 @@ def main():
                 p2_s = min(p1sat, p2sat)
 
                 fig1, fig2 = isothermalPlots(x1, y1, P, p1_s, p2_s)
-                st.write(fig1, fig2)
-            except:
-                pass
-            try:
-                T = vledata[choice - 1]['T [K]']
-                x1 = vledata[choice - 1]['x1 [mol/mol]']
-                y1 = vledata[choice - 1]['y1 [mol/mol]']
-                P = S[choice - 1]
+                show(fig1, fig2)
+            else:
+                T, P = dataset.T, dataset.condition
 
                 st.write(r'$P = %0.2f kPa$' % P)
 
@@ -118,18 +84,13 @@ def main():
 
                 if p1sat > p2sat:
                     st.info('The more volatile component is %s' % menu_options[i1])
-                    s1, s2 = compounds[i1], compounds[i2]
                 else:
                     st.info('The more volatile component is %s' % menu_options[i2])
-                    s1, s2 = compounds[i2], compounds[i1]
-
-                p1_s = get_psat(s1, T)
-                p2_s = get_psat(s2, T)
 
                 fig1, fig2 = isobaricPlots(x1, y1, T)
-                st.write(fig1, fig2)
-            except:
-                pass
+                show(fig1, fig2)
+    except OfflineError as e:
+        st.error(str(e))
     except:
         ''
     st.sidebar.title("Note")
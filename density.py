@@ -1,23 +1,68 @@
+import io
+import numpy as np
 import pandas as pd
+from cache import DiskCache
+from components import get_registry
+from fetch import get_text
+from metrics import timed
+from vlestore import DIPPR_KEYS
+
+DENSITY_URL = 'http://ddbonline.ddbst.de/DIPPR105DensityCalculation/DIPPR105CalculationCGI.exe?component='
+
+# DIPPR-105 constants for components whose DDBST page can't be used (Perry's, A converted to kg/m3)
+FALLBACK = {
+    'Hexane': {'A': 61.0327, 'B': 0.26411, 'C': 507.6, 'D': 0.27537, 'Tmin': 177.83, 'Tmax': 507.6},
+}
+
+
+@timed('parse', page='dippr105')
+def parse_dippr105(html):
+    # rho = A / B^(1 + (1 - T/C)^D) in kg/m3, valid for Tmin <= T/K <= Tmax
+    density = pd.read_html(io.StringIO(html))[6]
+    density = density.drop(density.index[0:3]).drop('No.', axis=1)
+    for _, row in density.iterrows():
+        try:
+            params = {key: float(row[key]) for key in ('A', 'B', 'C', 'D', 'Tmin', 'Tmax')}
+        except (TypeError, ValueError):
+            continue
+        if not np.isnan(params['A']):
+            return params
+    raise ValueError('no DIPPR-105 coefficients found')
+
+
+class DensityStore:
+    def __init__(self, disk=None):
+        self.disk = disk if disk is not None else DiskCache('dippr105')
+
+    def fetch(self, component):
+        component = component.replace('%20', '+')
+        try:
+            return self.disk.get_or_fetch(component, lambda: parse_dippr105(get_text(DENSITY_URL + component)))
+        except Exception:
+            if component not in FALLBACK:
+                raise
+            return FALLBACK[component]
+
+    def constants(self, component):
+        # the component's row of the registry, columns DIPPR_KEYS
+        registry = get_registry()
+        i = registry.id(component)
+        if not registry.has_dippr(i):
+            registry.set_dippr(i, self.fetch(component))
+        return registry.dippr[i]
+
+    def params(self, component):
+        return {key: float(value) for key, value in zip(DIPPR_KEYS, self.constants(component))}
+
+    def rho(self, component, T):
+        A, B, C, D = self.constants(component)[:4]
+        T = np.asarray(T, dtype=float)
+        rho = A / B ** (1 + (1 - T / C) ** D)  # in kg/m3
+        return rho[()] if np.ndim(rho) == 0 else rho
+
+
+store = DensityStore()
 
 
 def get_density(s, T):
-    try:
-        s = s.replace('%20', '+')
-    except:
-        pass
-    density_url = 'http://ddbonline.ddbst.de/DIPPR105DensityCalculation/DIPPR105CalculationCGI.exe?component=' + s
-    if s == 'Hexane':
-        rho = float(655)
-    else:
-        density = pd.read_html(density_url)[6]
-        density = density.drop(density.index[0:3]).drop('No.', axis=1)
-        A = float(density['A'])
-        B = float(density['B'])
-        C = float(density['C'])
-        D = float(density['D'])
-        Tmin, Tmax = float(density['Tmin']), float(density['Tmax'])  # in K
-
-        def rho(T):
-            return A / B ** (1 + (1 - T / C) ** D)
-    return rho(T) if s != 'Hexane' else rho
+    return store.rho(s, T)
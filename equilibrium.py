@@ -0,0 +1,84 @@
+import numpy as np
+import scipy.constants as constants
+from scipy.special import xlogy
+from antoine import get_psat, store as antoine_store
+from bubbledew import bubble_T
+from columndesign import EquilibriumCurve
+from memo import Memo, memoize
+import models.leaderboard
+from models.uniquac import UNIQUAC
+
+# y-x curves of the more volatile component built from DDBST datasets, either straight from
+# the data or from a model fitted to it, for the McCabe-Thiele stage stepper
+
+ISOTHERMAL_MODELS = ['Raw data'] + list(models.leaderboard.MODELS)
+ISOBARIC_MODELS = ['Raw data', 'UNIQUAC']
+
+N_MODEL = 200
+
+# one curve per (dataset, model), shared by every session
+curves = Memo(name='equilibrium.curves')
+
+
+@memoize()
+def activity_coefficients(x1, y1, P, p1_s, p2_s, T):
+    # modified Raoult's law γ1, γ2 of isothermal x1, y1, P data and the excess Gibbs energy they give
+    gamma1 = P * y1 / (x1 * p1_s)
+    gamma2 = P * (1 - y1) / ((1 - x1) * p2_s)
+    return gamma1, gamma2, constants.R * T * (xlogy(x1, gamma1) + xlogy(1 - x1, gamma2))
+
+
+def get_curve(key, build):
+    hit, curve = curves.get(key)
+    if not hit:
+        curve = build()
+        curves.set(key, curve)
+    return curve
+
+
+def light_first(dataset):
+    # the components with the more volatile one first, and its compositions
+    c1, c2 = dataset.pair
+    T = np.mean(dataset.T)
+    if get_psat(c1, T) >= get_psat(c2, T):
+        return c1, c2, dataset.x1, dataset.y1
+    return c2, c1, 1 - dataset.x1, 1 - dataset.y1
+
+
+def isothermal_curve(dataset, model='Raw data'):
+    def build():
+        if model == 'Raw data':
+            return EquilibriumCurve(*light_first(dataset)[2:])
+
+        data = dataset.interior()
+        s1, s2, x1, y1 = light_first(data)
+        T = data.condition
+        p1_s, p2_s = get_psat(s1, T), get_psat(s2, T)
+        G_e = activity_coefficients(x1, y1, data.P, p1_s, p2_s, T)[2]
+
+        x = np.linspace(0, 1, N_MODEL)
+        gamma1, gamma2 = models.leaderboard.MODELS[model](x1, G_e, T, s1, s2, x)[1:]
+        return EquilibriumCurve(x, x * p1_s * gamma1 / (x * p1_s * gamma1 + (1 - x) * p2_s * gamma2))
+
+    return get_curve((dataset.cache_key, model), build)
+
+
+def isobaric_curve(dataset, model='Raw data'):
+    def build():
+        if model == 'Raw data':
+            return EquilibriumCurve(*light_first(dataset)[2:])
+
+        data = dataset.interior()
+        s1, s2, x1, y1 = light_first(data)
+        P, T = data.condition, data.T
+        gamma1 = P * y1 / (x1 * get_psat(s1, T))
+        gamma2 = P * (1 - y1) / ((1 - x1) * get_psat(s2, T))
+        uniquac = UNIQUAC(s1, s2)
+        A, B = uniquac.get_parameter([x1, T], np.concatenate((gamma1, gamma2)))['x']
+
+        x = np.linspace(0.001, 0.999, N_MODEL)
+        T_pred, y_pred, report = bubble_T(x, P, antoine_store.vapor_pressure(s1),
+                                          antoine_store.vapor_pressure(s2), uniquac.activity(A, B))
+        return EquilibriumCurve(x[report.converged], y_pred[report.converged])
+
+    return get_curve((dataset.cache_key, model), build)
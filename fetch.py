@@ -0,0 +1,68 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+import requests
+from requests.adapters import HTTPAdapter
+import cache
+import metrics
+from standin import Fixtures, MissingFixture
+
+POOL_SIZE = int(os.environ.get('VLE_FETCH_POOL', 8))
+TIMEOUT = float(os.environ.get('VLE_FETCH_TIMEOUT', 30))
+# save every response as a fixture, and/or ask a stand-in server (standin.py) instead of the network
+RECORD = os.environ.get('VLE_RECORD')
+STANDIN = os.environ.get('VLE_STANDIN')
+
+# one keep-alive session for every outbound request, its connection pool is shared between threads
+session = requests.Session()
+session.mount('http://', HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE))
+session.mount('https://', HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE))
+
+executor = ThreadPoolExecutor(max_workers=POOL_SIZE, thread_name_prefix='fetch')
+# fan-outs started from inside a fetch worker go to a second pool, so they can't wait on their own pool
+inner_executor = ThreadPoolExecutor(max_workers=POOL_SIZE, thread_name_prefix='fetch-inner')
+
+
+fixtures = Fixtures(RECORD) if RECORD else None
+
+
+def get(url):
+    if cache.is_offline():
+        raise cache.OfflineError('%s is not cached and offline mode is on' % url)
+    with metrics.span('http_request'):
+        if STANDIN:
+            response = session.get(STANDIN.rstrip('/') + '/?' + urlencode({'url': url}), timeout=TIMEOUT)
+        else:
+            response = session.get(url, timeout=TIMEOUT)
+    metrics.inc('http_requests', status=response.status_code)
+    if response.headers.get('X-Standin') == 'miss':
+        # not an answer about the page, which a 404 would otherwise be cached as
+        raise MissingFixture('the stand-in has no fixture for %s' % url)
+    if fixtures is not None:
+        fixtures.record(url, response)
+    return response
+
+
+def get_text(url):
+    response = get(url)
+    response.raise_for_status()
+    return response.text
+
+
+def fan_out(calls):
+    # run independent calls concurrently, results (or the exception raised) in the same order
+    thread = threading.current_thread().name
+    if thread.startswith('fetch-inner'):
+        futures = None
+    elif thread.startswith('fetch'):
+        futures = [inner_executor.submit(metrics.bind(call)) for call in calls]
+    else:
+        futures = [executor.submit(metrics.bind(call)) for call in calls]
+    results = []
+    for i, call in enumerate(calls):
+        try:
+            results.append(futures[i].result() if futures else call())
+        except Exception as e:
+            results.append(e)
+    return results
@@ -0,0 +1,95 @@
+import argparse
+import itertools
+import sys
+import cache
+import components
+import memo
+import pairindex
+import vlestore
+from antoine import store as antoine_store
+from components import COMPOUNDS
+from density import store as density_store
+from fetch import fan_out
+from vledata import SNAPSHOT, fetch_page, get_datasets, page_order
+from pairindex import INDEX_PATH, write_index
+from vlestore import STORE_PATH, write_store
+
+
+def ingest(compounds=COMPOUNDS, snapshot=SNAPSHOT, path=STORE_PATH, index_path=INDEX_PATH, log=print):
+    # crawl DDBST (or the disk cache) only: with an earlier store or index in use, or anything
+    # memoized from them, a re-run would copy those instead of crawling again
+    use_ingested(False)
+    try:
+        return crawl(compounds, snapshot, path, index_path, log)
+    finally:
+        use_ingested(True)
+
+
+def use_ingested(enabled):
+    vlestore.set_enabled(enabled)
+    pairindex.set_enabled(enabled)
+    components.reset()
+    memo.clear_all()
+
+
+def crawl(compounds, snapshot, path, index_path, log):
+    # crawl every unordered pair once, with the same page lookup and table detection the pages use
+    combinations = list(itertools.combinations(compounds, 2))
+    # warm the page cache concurrently, the loop below then only reads from it
+    fan_out([lambda c1=c1, c2=c2: get_datasets(c1, c2, snapshot) for c1, c2 in combinations])
+    fan_out([lambda c=c: (antoine_store.params(c), density_store.params(c)) for c in compounds])
+
+    pairs = []
+    datasets = []
+    available = []
+    failed = 0
+    for c1, c2 in combinations:
+        # a page that can't be fetched or parsed is left out, like the warm-up above does
+        try:
+            url = fetch_page(c1, c2, snapshot)[0]
+            found = [] if url is None else get_datasets(c1, c2, snapshot)
+        except Exception as e:
+            log('%s / %s failed: %s: %s' % (c1, c2, type(e).__name__, e))
+            failed += 1
+            continue
+        pairs.append((c1, c2, url))
+        if url is None:
+            available.append((c1, c2, None, []))
+            continue
+        pair = page_order(url, c1, c2, snapshot)
+        datasets.extend(found)
+        available.append((c1, c2, pair, found))
+        log('%s / %s: %d datasets' % (pair[0], pair[1], len(found)))
+
+    antoine, dippr = {}, {}
+    for component in compounds:
+        try:
+            antoine[component] = antoine_store.params(component)
+        except Exception as e:
+            log('%s: no Antoine coefficients (%s)' % (component, e))
+        try:
+            dippr[component.replace('%20', '+')] = density_store.params(component)
+        except Exception as e:
+            log('%s: no DIPPR-105 coefficients (%s)' % (component, e))
+
+    write_store(path, snapshot, pairs, datasets, antoine, dippr)
+    log('%d pairs, %d datasets written to %s, %d pairs failed' % (len(pairs), len(datasets), path, failed))
+    write_index(index_path, snapshot, available)
+    log('availability of %d pairs written to %s' % (len(available), index_path))
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Crawl every compound pair at DDBST into a local VLE store")
+    parser.add_argument('--out', default=STORE_PATH)
+    parser.add_argument('--index', default=INDEX_PATH, help='where the pair availability index goes')
+    parser.add_argument('--snapshot', default=SNAPSHOT)
+    parser.add_argument('--offline', action='store_true', help='only use pages already in the disk cache')
+    args = parser.parse_args(argv)
+    if args.offline:
+        cache.set_offline(True)
+    ingest(snapshot=args.snapshot, path=args.out, index_path=args.index)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,137 @@
+import hashlib
+import inspect
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from functools import wraps
+import numpy as np
+import pandas as pd
+import metrics
+
+# In-process memoization of the expensive pure steps behind the pages (dataset loads, property
+# lookups, activity coefficients, fits, rendered charts). Entries are keyed by a stable hash of
+# the arguments, so equal arrays hit the same entry in every session served by this process.
+
+MAX_ENTRIES = int(os.environ.get('VLE_MEMO_SIZE', 256))
+TTL = float(os.environ.get('VLE_MEMO_TTL', 3600))
+
+# every Memo in the process, for clear_all
+memos = weakref.WeakSet()
+
+
+def fingerprint(value, h=None):
+    # a stable digest of nested arrays, frames, numbers, strings and plain objects (by their
+    # cache_key or attributes), independent of object identity
+    top = h is None
+    h = h or hashlib.sha256()
+    if isinstance(value, pd.DataFrame):
+        h.update(b'frame')
+        fingerprint(list(value.columns), h)
+        h.update(pd.util.hash_pandas_object(value, index=True).values.tobytes())
+    elif isinstance(value, (np.ndarray, pd.Series, pd.Index)):
+        array = np.ascontiguousarray(np.asarray(value))
+        h.update(b'array' + array.dtype.str.encode() + str(array.shape).encode())
+        h.update(array.tobytes() if array.dtype != object else repr(array.tolist()).encode())
+    elif isinstance(value, dict):
+        h.update(b'dict')
+        for k in sorted(value, key=repr):
+            fingerprint(k, h)
+            fingerprint(value[k], h)
+    elif isinstance(value, (list, tuple)):
+        h.update(b'seq%d' % len(value))
+        for v in value:
+            fingerprint(v, h)
+    elif isinstance(value, (str, bytes, int, float, complex, bool, type(None), np.generic)):
+        h.update(repr(value).encode())
+    elif hasattr(value, 'cache_key'):
+        # objects that carry a digest of their own content (vledata.VLEDataset)
+        h.update(b'keyed' + type(value).__qualname__.encode() + value.cache_key.encode())
+    elif hasattr(value, '__dict__'):
+        h.update(b'object' + type(value).__qualname__.encode())
+        fingerprint(vars(value), h)
+    else:
+        h.update(repr(value).encode())
+    return h.hexdigest() if top else h
+
+
+class Memo:
+    # least recently used entries go first once there are more than maxsize of them or their
+    # sizeof adds up to more than max_bytes; entries older than ttl seconds are never served
+    def __init__(self, maxsize=MAX_ENTRIES, ttl=TTL, max_bytes=None, sizeof=None, name=None):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof or (lambda value: 0)
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        memos.add(self)
+
+    def get(self, key):
+        # (True, value) on a hit, (False, None) otherwise
+        with self.lock:
+            entry = self.entries.get(key)
+            hit = entry is not None and (self.ttl is None or time.time() - entry[0] <= self.ttl)
+            if hit:
+                self.entries.move_to_end(key)
+                self.hits += 1
+            else:
+                if entry is not None:
+                    self._drop(key)
+                self.misses += 1
+        metrics.inc('memo', memo=self.name, result='hit' if hit else 'miss')
+        return (True, entry[1]) if hit else (False, None)
+
+    def set(self, key, value):
+        size = self.sizeof(value)
+        with self.lock:
+            if key in self.entries:
+                self._drop(key)
+            self.entries[key] = (time.time(), value, size)
+            self.size += size
+            while len(self.entries) > 1 and ((self.maxsize is not None and len(self.entries) > self.maxsize) or
+                                             (self.max_bytes is not None and self.size > self.max_bytes)):
+                self._drop(next(iter(self.entries)))
+
+    def _drop(self, key):
+        self.size -= self.entries.pop(key)[2]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+
+def clear_all():
+    # forget everything memoized, e.g. so that a benchmark measures the work and not the cache
+    for memo in list(memos):
+        memo.clear()
+
+
+def memoize(maxsize=MAX_ENTRIES, ttl=TTL, ignore=(), memo=None):
+    # arguments named in ignore (progress callbacks) are left out of the key; exceptions are not cached
+    def decorator(f):
+        name = (f.__module__, f.__qualname__)
+        cache = memo or Memo(maxsize, ttl, name='%s.%s' % name)
+        signature = inspect.signature(f)
+
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = fingerprint((name, [(k, v) for k, v in bound.arguments.items() if k not in ignore]))
+            hit, value = cache.get(key)
+            if not hit:
+                value = f(*args, **kwargs)
+                cache.set(key, value)
+            return value
+
+        wrapper.memo = cache
+        return wrapper
+
+    return decorator
@@ -0,0 +1,251 @@
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Timing spans, counters and observations (optimizer iterations) around the stages of a render:
+# fetches, HTML parsing, fits, bubble/dew solves and charts. Off unless VLE_METRICS is set, and
+# then a span is one flag check. Everything goes into a process-wide registry, served in the
+# Prometheus text format (api.py /metrics, or VLE_METRICS_PORT next to the app), and into the
+# record of the render in progress (collect), which is logged as one JSON line and shown in the
+# sidebar.
+
+ENABLED = os.environ.get('VLE_METRICS', '0') not in ('', '0', 'false', 'False')
+PORT = int(os.environ.get('VLE_METRICS_PORT', 0))
+PREFIX = 'vle_'
+
+log = logging.getLogger('vle.metrics')
+
+# the record of the render in progress, carried into worker threads by bind
+current = contextvars.ContextVar('vle_metrics_record', default=None)
+
+
+def enable(enabled=True):
+    global ENABLED
+    ENABLED = enabled
+
+
+def key(name, labels):
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class Registry:
+    # counters: {key: value}, summaries (span seconds and observations): {key: [count, sum]}
+    def __init__(self):
+        self.counters = {}
+        self.summaries = {}
+        self.lock = threading.Lock()
+
+    def inc(self, k, value=1):
+        with self.lock:
+            self.counters[k] = self.counters.get(k, 0) + value
+
+    def observe(self, k, value):
+        with self.lock:
+            summary = self.summaries.setdefault(k, [0, 0.0])
+            summary[0] += 1
+            summary[1] += value
+
+    def snapshot(self):
+        with self.lock:
+            return {'counters': dict(self.counters), 'summaries': {k: list(v) for k, v in self.summaries.items()}}
+
+    def merge(self, snapshot):
+        # add what another registry (a worker process, a finished render) counted
+        with self.lock:
+            for k, value in snapshot['counters'].items():
+                self.counters[k] = self.counters.get(k, 0) + value
+            for k, (count, total) in snapshot['summaries'].items():
+                summary = self.summaries.setdefault(k, [0, 0.0])
+                summary[0] += count
+                summary[1] += total
+
+
+registry = Registry()
+
+
+class Record(Registry):
+    # what one render did, on top of the process-wide registry
+    def __init__(self, name):
+        super().__init__()
+        self.name = name
+        self.start = time.perf_counter()
+        self.seconds = None
+
+
+def inc(metric, value=1, **labels):
+    if not ENABLED:
+        return
+    k = key(metric, labels)
+    registry.inc(k, value)
+    record = current.get()
+    if record is not None:
+        record.inc(k, value)
+
+
+def observe(metric, value, **labels):
+    if not ENABLED:
+        return
+    k = key(metric, labels)
+    registry.observe(k, value)
+    record = current.get()
+    if record is not None:
+        record.observe(k, value)
+
+
+class Span:
+    def __init__(self, metric, labels):
+        self.metric = metric
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.metric + '_seconds', time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+class NoSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+no_span = NoSpan()
+
+
+def span(metric, **labels):
+    # with span('fetch'): ... records the seconds it took, labels included
+    return Span(metric, labels) if ENABLED else no_span
+
+
+def timed(metric, **labels):
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return f(*args, **kwargs)
+            with Span(metric, labels):
+                return f(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def bind(f):
+    # f, run in the caller's context when called from another thread (executor.submit(bind(f)))
+    if not ENABLED:
+        return f
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.run(f, *args, **kwargs)
+
+
+class collect:
+    # with collect('Isothermal Data') as record: ... record is None when metrics are off
+    def __init__(self, name):
+        self.name = name
+        self.record = None
+
+    def __enter__(self):
+        if ENABLED:
+            self.record = Record(self.name)
+            self.token = current.set(self.record)
+        return self.record
+
+    def __exit__(self, *exc):
+        if self.record is not None:
+            current.reset(self.token)
+            self.record.seconds = time.perf_counter() - self.record.start
+            log.info(json.dumps(to_json(self.record)))
+        return False
+
+
+def label_text(labels):
+    return ','.join('%s=%s' % pair for pair in labels)
+
+
+def to_json(record):
+    return {'event': 'render', 'name': record.name, 'seconds': round(record.seconds, 6),
+            'counters': {name + ('{%s}' % label_text(labels) if labels else ''): value
+                         for (name, labels), value in sorted(record.counters.items())},
+            'spans': {name + ('{%s}' % label_text(labels) if labels else ''): {'count': count, 'sum': round(total, 6)}
+                      for (name, labels), (count, total) in sorted(record.summaries.items())}}
+
+
+def summary(record):
+    # a fixed-width table of a record, for the debug panel
+    lines = ['%-52s %6s %10s' % ('', 'count', 'total')]
+    for (name, labels), (count, total) in sorted(record.summaries.items()):
+        label = name + (' ' + label_text(labels) if labels else '')
+        unit = '%8.1f ms' % (1e3 * total) if name.endswith('_seconds') else '%10.0f' % total
+        lines.append('%-52s %6d %s' % (label[:52], count, unit))
+    for (name, labels), value in sorted(record.counters.items()):
+        label = name + (' ' + label_text(labels) if labels else '')
+        lines.append('%-52s %6d' % (label[:52], value))
+    lines.append('%-52s %6s %8.1f ms' % ('total', '', 1e3 * record.seconds))
+    return '\n'.join(lines)
+
+
+def exposition(registry=registry):
+    # Prometheus text format: counters as <name>_total, spans and observations as summaries
+    def series(name, labels, value):
+        escaped = ','.join('%s="%s"' % (k, v.replace('\\', '\\\\').replace('"', '\\"')) for k, v in labels)
+        return '%s%s %s' % (name, '{%s}' % escaped if labels else '', repr(float(value)))
+
+    snapshot = registry.snapshot()
+    lines = []
+    for name in sorted({name for name, _ in snapshot['counters']}):
+        metric = PREFIX + name + '_total'
+        lines.append('# TYPE %s counter' % metric)
+        lines += [series(metric, labels, value) for (n, labels), value in sorted(snapshot['counters'].items())
+                  if n == name]
+    for name in sorted({name for name, _ in snapshot['summaries']}):
+        metric = PREFIX + name
+        lines.append('# TYPE %s summary' % metric)
+        for (n, labels), (count, total) in sorted(snapshot['summaries'].items()):
+            if n == name:
+                lines.append(series(metric + '_count', labels, count))
+                lines.append(series(metric + '_sum', labels, total))
+    return '\n'.join(lines) + '\n'
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        data = exposition().encode()
+        self.send_response(200 if self.path.split('?')[0] == '/metrics' else 404)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+server = None
+server_lock = threading.Lock()
+
+
+def serve_in_background(port=PORT, host='0.0.0.0'):
+    # one /metrics server per process, however often the page script reruns
+    global server
+    with server_lock:
+        if server is None and port:
+            server = ThreadingHTTPServer((host, port), Handler)
+            threading.Thread(target=server.serve_forever, daemon=True, name='metrics').start()
+    return server
+
+
+if ENABLED and not log.handlers:
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    log.addHandler(handler)
+    log.setLevel(logging.INFO)
+    log.propagate = False
@@ -1,11 +1,10 @@
-from scipy.stats import gmean
-from sklearn.metrics import r2_score
 import numpy as np
+from models.linearfit import r2_score
 
 
 def get_alpha_gm(x, y):
     alpha = np.divide((y * (1 - x)) , (x * (1 - y)))
-    alpha_gm = gmean(alpha)
+    alpha_gm = np.exp(np.mean(np.log(alpha)))
     if alpha_gm < 1:
         alpha_gm = 1/alpha_gm
     y_alpha = alpha_gm * x / (1 + (alpha_gm - 1) * x)
@@ -0,0 +1,75 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+import metrics
+from models.margules import Margules
+from models.redlichkister import RK2
+from models.vanlaar import VanLaar
+from models.wohls import Wohls
+
+executor = ThreadPoolExecutor(max_workers=int(os.environ.get('VLE_FIT_WORKERS', 4)), thread_name_prefix='fit')
+
+
+def gammas(m, x, params, T):
+    return m.gamma1(x, *params, T), m.gamma2(x, *params, T)
+
+
+def wohls_gammas(m, x, params, T):
+    # Wohls' γ are functions of the volume fraction z1
+    z = x * m.q1 / (x * m.q1 + (1 - x) * m.q2)
+    return m.gamma1(z, *params), m.gamma2(z, *params)
+
+
+# name: (the model for components s1, s2 at T, its γ1 and γ2 at x for fitted parameters)
+FITTERS = {"Margules": (lambda s1, s2, T: Margules(), gammas),
+           "Redlich Kister": (lambda s1, s2, T: RK2(), gammas),
+           "van Laar": (lambda s1, s2, T: VanLaar(), gammas),
+           "Truncated Wohls": (Wohls, wohls_gammas)}
+
+
+def fitter(make, gammas):
+    def fit_model(x1, G_e, T, s1, s2, x=None):
+        m = make(s1, s2, T)
+        fit = m.fit(x1, G_e)
+        return (fit,) + gammas(m, x1 if x is None else x, fit['params'], T)
+    return fit_model
+
+
+# each fitter returns the fit and γ1, γ2 at x (the data points unless given)
+MODELS = {name: fitter(make, gammas) for name, (make, gammas) in FITTERS.items()}
+
+
+def score(name, x1, y1, P, G_e, p1_s, p2_s, T, s1, s2):
+    # fit one model and compare its predicted P and y with the data; AIC from the G^E residuals
+    fit, gamma1, gamma2 = MODELS[name](x1, G_e, T, s1, s2)
+    P_calc = x1 * p1_s * gamma1 + (1 - x1) * p2_s * gamma2
+    y_calc = x1 * p1_s * gamma1 / P_calc
+    n, k = len(x1), len(fit['params'])
+    ss = np.sum(fit['residuals'] ** 2)
+    return {'Model': name,
+            'Parameters': ', '.join('%0.3f' % p for p in fit['params']),
+            'R²': fit['r2'],
+            'RMSE P (kPa)': np.sqrt(np.mean((P_calc - P) ** 2)),
+            'RMSE y': np.sqrt(np.mean((y_calc - y1) ** 2)),
+            'AIC': n * np.log(ss / n) + 2 * k,
+            'params': fit['params']}
+
+
+def fit_all(x1, y1, P, G_e, p1_s, p2_s, T, s1=None, s2=None, models=None):
+    # every model fitted concurrently on the same arrays, ranked by AIC (lowest first);
+    # a model that fails to fit comes last, with its error
+    x1, y1, P, G_e = (np.asarray(a, dtype=float) for a in (x1, y1, P, G_e))
+    names = [name for name in (models or MODELS) if name != "Truncated Wohls" or s1 is not None]
+    futures = [executor.submit(metrics.bind(score), name, x1, y1, P, G_e, p1_s, p2_s, T, s1, s2) for name in names]
+    rows = []
+    for name, future in zip(names, futures):
+        try:
+            rows.append(dict(future.result(), Error=None))
+        except Exception as e:
+            rows.append({'Model': name, 'Error': '%s: %s' % (type(e).__name__, e)})
+    table = pd.DataFrame(rows, columns=['Model', 'Parameters', 'R²', 'RMSE P (kPa)', 'RMSE y', 'AIC', 'Error',
+                                        'params'])
+    table = table.sort_values('AIC', na_position='last', kind='stable').reset_index(drop=True)
+    table.index += 1
+    return table
@@ -0,0 +1,28 @@
+import numpy as np
+from models.progress import FitProgress
+
+
+def fit_linear(design, y, callback=None):
+    # least squares for models linear in their parameters (G^E of Margules, Redlich-Kister, Wohls),
+    # y = design @ params, in one pass: parameters, their covariance (scaled by the residual variance,
+    # as curve_fit does) and R², reported to callback as a single evaluation
+    progress = FitProgress(callback, optimizer='lstsq')
+    design = np.asarray(design, dtype=float)
+    y = np.asarray(y, dtype=float)
+    params, _, rank, _ = np.linalg.lstsq(design, y, rcond=None)
+    residuals = y - design @ params
+    progress.update(residuals)
+    progress.done()
+    ss_res = residuals @ residuals
+    dof = len(y) - design.shape[1]
+    if rank == design.shape[1] and dof > 0:
+        cov = np.linalg.inv(design.T @ design) * ss_res / dof
+    else:
+        cov = np.full((design.shape[1], design.shape[1]), np.inf)
+    return {'params': params, 'cov': cov, 'r2': r2_score(y, design @ params), 'residuals': residuals}
+
+
+def r2_score(y, y_pred):
+    y = np.asarray(y, dtype=float)
+    residuals = y - np.asarray(y_pred, dtype=float)
+    return 1 - (residuals @ residuals) / np.sum((y - y.mean()) ** 2)
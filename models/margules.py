@@ -1,10 +1,7 @@
-import streamlit as st
 import scipy.constants as constants
 import numpy as np
-import scipy.optimize as opt
-from sklearn import metrics
-import matplotlib.pyplot as plt
-from matplotlib import style
+from models.linearfit import fit_linear
+from memo import memoize
 
 
 class Margules:
@@ -17,57 +14,31 @@ class Margules:
     def gamma2(self, x, A, T):
         return np.exp(A * x ** 2 / (constants.R * T))
 
-    # @st.cache(suppress_st_warning=True)
-    def get_parameter(self, x, G_e):
-        A, params_cov = opt.curve_fit(self.Ge, x, G_e, p0=1000, maxfev=10000)
-        return A
+    def design(self, x):
+        x = np.asarray(x, dtype=float)
+        return (x * (1 - x))[:, None]
 
-    # @st.cache(suppress_st_warning=True)
-    def get_accuracy(self, G_e, x1):
-        A = self.get_parameter(x1, G_e)
-        Ge = self.Ge(x1, A)
-        return metrics.r2_score(G_e, Ge)
+    @memoize(ignore=('callback',))
+    def fit(self, x, G_e, callback=None):
+        return fit_linear(self.design(x), G_e, callback)
 
+    def get_parameter(self, x, G_e, callback=None):
+        return self.fit(x, G_e, callback)['params']
 
-def main(x1, y1, P, G_e, x, p1_s, p2_s, T, P_raoult):
-    style.use('classic')
+    def get_accuracy(self, G_e, x1, callback=None):
+        return self.fit(x1, G_e, callback)['r2']
 
-    A = Margules().get_parameter(x1, G_e)
-    acc = Margules().get_accuracy(G_e, x1)
 
-    fig4 = plt.figure(facecolor='white')
-    plt.title(r"$G^E-x$")
-    plt.xlim(0, 1)
-    plt.xlabel(r'$x_1$')
-    plt.ylabel(r'$G^E\ (J/mol)$')
-    plt.scatter(x1, G_e)
-    plt.plot(x, Margules().Ge(x, A), label=r"$Margules\ model$", color='red')
-    plt.axhline(0, color='black')
+def main(x1, y1, P, G_e, x, p1_s, p2_s, T, P_raoult, callback=None):
+    # matplotlib only once a chart is drawn, not for fits alone (api.py)
+    from plots import modelPlots
+    fit = Margules().fit(x1, G_e, callback)
+    A, acc = fit['params'], fit['r2']
 
     P_margules = x * p1_s * Margules().gamma1(x, A, T) + (1 - x) * p2_s * Margules().gamma2(x, A, T)
     y_margules = x * p1_s * Margules().gamma1(x, A, T) / P_margules
 
-    fig5 = plt.figure(facecolor='white')
-    plt.title(r"$P-x$")
-    plt.xlim(0, 1)
-    plt.ylim(0.6 * min(P_margules), 1.2 * max(P_margules))
-    plt.xlabel(r'$x_1$')
-    plt.ylabel(r'$P\ (kPa)$')
-    plt.scatter(x1, P)
-    plt.plot(x, P_margules, label=r"$Margules\ model$", color='red')
-    plt.plot(x, P_raoult, color='black', label=r"$Raoult's\ Law$")
-    plt.legend(loc='best', fontsize=10)
-
-    fig6 = plt.figure(facecolor='white')
-    plt.gca().set_aspect('equal', adjustable='box')
-    plt.title(r"$y-x$")
-    plt.xlim(0, 1)
-    plt.ylim(0, 1)
-    plt.xlabel(r'$x_1$')
-    plt.ylabel(r'$y_1$')
-    plt.scatter(x1, y1)
-    plt.plot(x, y_margules, label=r"$Margules\ model$", color='red')
-    plt.plot(x, x, color='black')
-    plt.legend(loc='best', fontsize=10)
+    fig4, fig5, fig6 = modelPlots(x1, y1, P, G_e, x, Margules().Ge(x, A), P_margules, y_margules, P_raoult,
+                                  r"$Margules\ model$", 0.6 * min(P_margules))
 
     return A, acc, fig4, fig5, fig6
@@ -0,0 +1,50 @@
+import time
+import numpy as np
+import metrics
+
+
+class FitProgress:
+    # Counts objective evaluations of a fit and reports them to callback(iteration, residual, elapsed),
+    # residual being the norm of the current residual vector and elapsed the seconds since the fit started.
+    # Reports are throttled to one per interval seconds; done() always sends the final state and
+    # records the evaluations and seconds of the fit under the optimizer's name.
+    def __init__(self, callback=None, interval=0.1, optimizer='fit'):
+        self.callback = callback
+        self.optimizer = optimizer
+        self.interval = interval
+        self.iteration = 0
+        self.residual = np.nan
+        self.start = time.perf_counter()
+        self.last = -np.inf
+
+    def update(self, residuals):
+        self.iteration += 1
+        self.residual = float(np.linalg.norm(residuals))
+        if self.callback is not None:
+            now = time.perf_counter()
+            if now - self.last >= self.interval:
+                self.last = now
+                self.callback(self.iteration, self.residual, now - self.start)
+
+    def model(self, f, target):
+        # wrap a curve_fit model function f(x, *params), residuals taken against target
+        def wrapped(x, *params):
+            values = f(x, *params)
+            self.update(values - target)
+            return values
+        return wrapped
+
+    def residuals(self, f):
+        # wrap a least_squares residual function
+        def wrapped(*args, **kwargs):
+            residuals = f(*args, **kwargs)
+            self.update(residuals)
+            return residuals
+        return wrapped
+
+    def done(self):
+        elapsed = time.perf_counter() - self.start
+        metrics.observe('optimizer_evaluations', self.iteration, optimizer=self.optimizer)
+        metrics.observe('fit_seconds', elapsed, optimizer=self.optimizer)
+        if self.callback is not None:
+            self.callback(self.iteration, self.residual, elapsed)
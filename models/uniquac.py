@@ -1,21 +1,17 @@
-import scipy.constants as constants
 import numpy as np
-import scipy.optimize as opt
-from sklearn import metrics
-import matplotlib.pyplot as plt
-from matplotlib import style
-import pandas as pd
 from scipy.constants import R
-
-uniquac_params = pd.read_csv("uniquac_params.txt", sep='!', names=['compound', 'r', 'q'])
+from components import get_registry
+from models.progress import FitProgress
+from memo import memoize
 
 
 def get_params(s1, s2):
-    r = np.zeros(2)
-    q = np.zeros(2)
-    for s, i in zip([s1, s2], range(2)):
-        r[i] = uniquac_params.loc[uniquac_params['compound'] == s]["r"]
-        q[i] = uniquac_params.loc[uniquac_params['compound'] == s]["q"]
+    registry = get_registry()
+    ids = [registry.id(s1), registry.id(s2)]
+    r, q = registry.r[ids], registry.q[ids]
+    if np.isnan(r).any():
+        raise ValueError('no UNIQUAC parameters for %s' % ' and '.join(s for s, i in zip((s1, s2), ids)
+                                                                       if np.isnan(registry.r[i])))
     return r, q
 
 
@@ -25,52 +21,87 @@ class UNIQUAC:
         self.s2 = s2
         self.r, self.q = get_params(self.s1, self.s2)
 
-    def params(self, X):
+    def kernel(self, X, A, B):
+        # ln γ1, ln γ2 and the shared residual-part quantities from a single pass
         [x, T] = X
-        self.phi1 = x * self.r[0] / (x * self.r[0] + (1 - x) * self.r[1])
-        self.theta1 = x * self.q[0] / (x * self.q[0] + (1 - x) * self.q[1])
-        self.theta2 = 1 - self.theta1
-        self.phi2 = 1 - self.phi1
-        self.l1 = 5 * (self.r[0] - self.q[0]) - (self.r[0] - 1)
-        self.l2 = 5 * (self.r[1] - self.q[1]) - (self.r[1] - 1)
+        x = np.asarray(x, dtype=float)
+        T = np.asarray(T, dtype=float)
+        r, q = self.r, self.q
+        phi1 = x * r[0] / (x * r[0] + (1 - x) * r[1])
+        phi2 = 1 - phi1
+        theta1 = x * q[0] / (x * q[0] + (1 - x) * q[1])
+        theta2 = 1 - theta1
+        l1 = 5 * (r[0] - q[0]) - (r[0] - 1)
+        l2 = 5 * (r[1] - q[1]) - (r[1] - 1)
+        lx = x * l1 + (1 - x) * l2
 
-    def gamma1(self, X, A, B):
-        [x, T] = X
-        self.params(X)
-        ln_gam_c1 = np.log(self.phi1 / x) + 5 * self.q[0] * np.log(
-            self.theta1 / self.phi1) + self.l1 - self.phi1 / x * (x * self.l1 + (1 - x) * self.l2)
-        gam_c1 = np.exp(ln_gam_c1)
+        ln_gam_c1 = np.log(phi1 / x) + 5 * q[0] * np.log(theta1 / phi1) + l1 - phi1 / x * lx
+        ln_gam_c2 = np.log(phi2 / (1 - x)) + 5 * q[1] * np.log(theta2 / phi2) + l2 - phi2 / (1 - x) * lx
+
+        RT = R * T
+        tau12 = np.exp(-A / RT)
+        tau21 = np.exp(-B / RT)
+        S1 = theta1 + theta2 * tau21
+        S2 = theta1 * tau12 + theta2
+
+        ln_gam_r1 = q[0] * (1 - np.log(S1) - theta1 / S1 - theta2 * tau12 / S2)
+        ln_gam_r2 = q[1] * (1 - np.log(S2) - theta1 * tau21 / S1 - theta2 / S2)
+        return ln_gam_c1 + ln_gam_r1, ln_gam_c2 + ln_gam_r2, (theta1, theta2, tau12, tau21, S1, S2, RT)
 
-        tau12 = np.exp(-A / (R * T))
-        tau21 = np.exp(-B / (R * T))
+    def dln_gamma(self, shared, dtau12, dtau21):
+        # derivatives of ln γ1, ln γ2 for given derivatives of tau12 and tau21,
+        # the combinatorial part depends on neither A, B nor T
+        theta1, theta2, tau12, tau21, S1, S2, RT = shared
+        d1 = -self.q[0] * theta2 ** 2 * (tau21 * dtau21 / S1 ** 2 + dtau12 / S2 ** 2)
+        d2 = -self.q[1] * theta1 ** 2 * (tau12 * dtau12 / S2 ** 2 + dtau21 / S1 ** 2)
+        return d1, d2
 
-        ln_gam_r1 = self.q[0] * (1 - np.log(self.theta1 + self.theta2 * tau21) -
-                                 self.theta1 / (self.theta1 + self.theta2 * tau21) -
-                                 self.theta2 * tau12 / (self.theta1 * tau12 + self.theta2))
-        gam_r1 = np.exp(ln_gam_r1)
-        return gam_r1 * gam_c1
+    def ln_gamma(self, X, A, B):
+        return self.kernel(X, A, B)[:2]
+
+    def gamma1(self, X, A, B):
+        return np.exp(self.ln_gamma(X, A, B)[0])
 
     def gamma2(self, X, A, B):
-        [x, T] = X
-        self.params(X)
-        ln_gam_c2 = np.log(self.phi2 / (1 - x)) + 5 * self.q[1] * np.log(self.theta2 / self.phi2) + self.l2 - \
-                    self.phi2 / (1 - x) * (x * self.l1 + (1 - x) * self.l2)
-        gam_c2 = np.exp(ln_gam_c2)
+        return np.exp(self.ln_gamma(X, A, B)[1])
 
-        tau12 = np.exp(-A / (R * T))
-        tau21 = np.exp(-B / (R * T))
+    def dln_gamma_dT(self, X, A, B, shared=None):
+        if shared is None:
+            shared = self.kernel(X, A, B)[2]
+        tau12, tau21, RT = shared[2], shared[3], shared[6]
+        T = RT / R
+        return self.dln_gamma(shared, tau12 * A / (RT * T), tau21 * B / (RT * T))
 
-        ln_gam_r2 = self.q[1] * (1 - np.log(self.theta1 * tau12 + self.theta2) -
-                                 self.theta1 * tau21 / (self.theta1 + self.theta2 * tau21) -
-                                 self.theta2 / (self.theta1 * tau12 + self.theta2))
-        gam_r2 = np.exp(ln_gam_r2)
-        return gam_r2 * gam_c2
+    def activity(self, A, B):
+        # (x, T) -> (ln γ1, ln γ2, ∂ln γ1/∂T, ∂ln γ2/∂T) for the bubble/dew solvers
+        def activity(x, T):
+            ln_gam1, ln_gam2, shared = self.kernel([x, T], A, B)
+            d1, d2 = self.dln_gamma_dT([x, T], A, B, shared)
+            return ln_gam1, ln_gam2, d1, d2
+        return activity
 
     def costfunction(self, params, X, gamma):
         [A, B] = params
-        residuals = (np.concatenate((self.gamma1(X, A, B), self.gamma2(X, A, B))) - gamma) / gamma
+        ln_gam1, ln_gam2, _ = self.kernel(X, A, B)
+        residuals = (np.exp(np.concatenate((ln_gam1, ln_gam2))) - gamma) / gamma
         return residuals
 
-    def get_parameter(self, X, gamma):
-        params = opt.least_squares(self.costfunction, [1000, 1000], args=(X, gamma))
+    def jacobian(self, params, X, gamma):
+        # analytic d(residuals)/d(u12 - u22, u21 - u11)
+        [A, B] = params
+        ln_gam1, ln_gam2, shared = self.kernel(X, A, B)
+        tau12, tau21, RT = shared[2], shared[3], shared[6]
+        zero = np.zeros_like(tau12)
+        dA = np.concatenate(self.dln_gamma(shared, -tau12 / RT, zero))
+        dB = np.concatenate(self.dln_gamma(shared, zero, -tau21 / RT))
+        scale = np.exp(np.concatenate((ln_gam1, ln_gam2))) / gamma
+        return np.column_stack((scale * dA, scale * dB))
+
+    @memoize(ignore=('callback',))
+    def get_parameter(self, X, gamma, callback=None):
+        from scipy.optimize import least_squares
+        progress = FitProgress(callback, optimizer='least_squares')
+        params = least_squares(progress.residuals(self.costfunction), [1000, 1000], jac=self.jacobian,
+                               args=(X, gamma))
+        progress.done()
         return params
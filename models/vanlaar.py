@@ -1,10 +1,8 @@
-import streamlit as st
 import scipy.constants as constants
 import numpy as np
-import scipy.optimize as opt
-from sklearn import metrics
-import matplotlib.pyplot as plt
-from matplotlib import style
+from models.linearfit import r2_score
+from models.progress import FitProgress
+from memo import memoize
 
 
 class VanLaar:
@@ -17,57 +15,33 @@ class VanLaar:
     def gamma2(self, x, A, B, T):
         return np.exp(B / ((constants.R * T) * (1 + (B * (1 - x)) / (A * x)) ** 2))
 
-    # @st.cache(suppress_st_warning=True)
-    def get_parameter(self, x, G_e):
-        [A, B], params_cov = opt.curve_fit(self.Ge, x, G_e, p0=[1000,1000], maxfev=10000)
+    @memoize(ignore=('callback',))
+    def fit(self, x, G_e, callback=None):
+        from scipy.optimize import curve_fit
+        progress = FitProgress(callback, optimizer='curve_fit')
+        [A, B], params_cov = curve_fit(progress.model(self.Ge, np.asarray(G_e)), x, G_e, p0=[1000,1000], maxfev=10000)
+        progress.done()
+        Ge = self.Ge(np.asarray(x, dtype=float), A, B)
+        return {'params': np.array([A, B]), 'cov': params_cov, 'r2': r2_score(G_e, Ge), 'residuals': np.asarray(G_e) - Ge}
+
+    def get_parameter(self, x, G_e, callback=None):
+        [A, B] = self.fit(x, G_e, callback)['params']
         return [A, B]
 
-    # @st.cache(suppress_st_warning=True)
-    def get_accuracy(self, G_e, x1):
-        [A, B] = self.get_parameter(x1, G_e)
-        return metrics.r2_score(G_e, self.Ge(x1, A, B))
+    def get_accuracy(self, G_e, x1, callback=None):
+        return self.fit(x1, G_e, callback)['r2']
 
 
-def main(x1, y1, P, G_e, x, p1_s, p2_s, T, P_raoult):
-    style.use('classic')
-
-    [A, B] = VanLaar().get_parameter(x1, G_e)
-    acc = VanLaar().get_accuracy(G_e, x1)
-
-    fig4 = plt.figure(facecolor='white')
-    plt.title(r"$G^E-x$")
-    plt.xlim(0, 1)
-    plt.xlabel(r'$x_1$')
-    plt.ylabel(r'$G^E\ (J/mol)$')
-    plt.scatter(x1, G_e)
-    plt.plot(x, VanLaar().Ge(x, A, B), label=r"$Van Laar\ model$", color='red')
-    plt.axhline(0, color='black')
+def main(x1, y1, P, G_e, x, p1_s, p2_s, T, P_raoult, callback=None):
+    from plots import modelPlots
+    fit = VanLaar().fit(x1, G_e, callback)
+    [A, B], acc = fit['params'], fit['r2']
 
     P_VanLaar = x * p1_s * VanLaar().gamma1(x, A, B, T) + (1 - x) * p2_s * VanLaar().gamma2(x, A, B, T)
     y_VanLaar = x * p1_s * VanLaar().gamma1(x, A, B, T) / P_VanLaar
 
-    fig5 = plt.figure(facecolor='white')
-    plt.title(r"$P-x$")
-    plt.xlim(0, 1)
-    plt.ylim(0, 1.2 * max(P_VanLaar))
-    plt.xlabel(r'$x_1$')
-    plt.ylabel(r'$P\ (kPa)$')
-    plt.scatter(x1, P)
-    plt.plot(x, P_VanLaar, label=r"$Van Laar\ model$", color='red')
-    plt.plot(x, P_raoult, color='black', label=r"$Raoult's\ Law$")
-    plt.legend(loc='best', fontsize=10)
-
-    fig6 = plt.figure(facecolor='white')
-    plt.gca().set_aspect('equal', adjustable='box')
-    plt.title(r"$y-x$")
-    plt.xlim(0, 1)
-    plt.ylim(0, 1)
-    plt.xlabel(r'$x_1$')
-    plt.ylabel(r'$y_1$')
-    plt.scatter(x1, y1)
-    plt.plot(x, y_VanLaar, label=r"$Van Laar\ model$", color='red')
-    plt.plot(x, x, color='black')
-    plt.legend(loc='best', fontsize=10)
+    fig4, fig5, fig6 = modelPlots(x1, y1, P, G_e, x, VanLaar().Ge(x, A, B), P_VanLaar, y_VanLaar, P_raoult,
+                                  r"$Van Laar\ model$")
 
     return [A, B], acc, fig4, fig5, fig6
 
@@ -1,11 +1,7 @@
-import streamlit as st
 import scipy.constants as constants
 import numpy as np
-import scipy.optimize as opt
-from scipy.special import xlogy
-from sklearn import metrics
-import matplotlib.pyplot as plt
-from matplotlib import style
+from models.linearfit import fit_linear
+from memo import memoize
 from volume import get_volume
 from antoine import get_psat
 
@@ -28,39 +24,29 @@ class Wohls:
     def gamma2(self, z, A):
         return np.exp(2 * A * self.q2 * z ** 2)
 
-    # @st.cache(suppress_st_warning=True)
-    def get_parameter(self, x, G_e):
-        A, params_cov = opt.curve_fit(self.Ge, x, G_e, p0=1000, maxfev=10000)
-        return A
+    def design(self, x1):
+        return self.Ge(x1, 1.0)[:, None]
 
-    # @st.cache(suppress_st_warning=True)
-    def get_accuracy(self, G_e, x1):
-        A = self.get_parameter(x1, G_e)
-        Ge = self.Ge(x1, A)
-        return metrics.r2_score(G_e, Ge)
+    @memoize(ignore=('callback',))
+    def fit(self, x, G_e, callback=None):
+        return fit_linear(self.design(x), G_e, callback)
 
+    def get_parameter(self, x, G_e, callback=None):
+        return self.fit(x, G_e, callback)['params']
 
-def main(x1, y1, P, G_e, T, s1, s2):
-    style.use('classic')
+    def get_accuracy(self, G_e, x1, callback=None):
+        return self.fit(x1, G_e, callback)['r2']
 
+
+def main(x1, y1, P, G_e, T, s1, s2, callback=None):
+    from plots import modelPlots
     w = Wohls(s1, s2, T)
-    A = w.get_parameter(x1, G_e)
-    acc = w.get_accuracy(G_e, x1)
+    fit = w.fit(x1, G_e, callback)
+    A, acc = fit['params'], fit['r2']
 
     x = np.linspace(0, 1, 50)
 
-    fig4 = plt.figure(facecolor='white')
-    plt.title(r"$G^E-x$")
-    plt.xlim(0, 1)
-    plt.xlabel(r'$x_1$')
-    plt.ylabel(r'$G^E\ (J/mol)$')
-    plt.scatter(x1, G_e)
-    plt.plot(x, w.Ge(x, A), label=r"$Wohls\ model$", color='red')
-    plt.axhline(0, color='black')
-
-    q1 = get_volume(s1, T)
-    q2 = get_volume(s2, T)
-    z = x * q1 / (x * q1 + (1 - x) * q2)
+    z = x * w.q1 / (x * w.q1 + (1 - x) * w.q2)
 
     p1_s = get_psat(s1, T)
     p2_s = get_psat(s2, T)
@@ -70,27 +56,7 @@ def main(x1, y1, P, G_e, T, s1, s2):
 
     P_raoult = x * p1_s + (1 - x) * p2_s
 
-    fig5 = plt.figure(facecolor='white')
-    plt.title(r"$P-x$")
-    plt.xlim(0, 1)
-    plt.ylim(0, 1.2 * max(P_Wohls))
-    plt.xlabel(r'$x_1$')
-    plt.ylabel(r'$P\ (kPa)$')
-    plt.scatter(x1, P)
-    plt.plot(x, P_Wohls, label=r"$Wohls\ model$", color='red')
-    plt.plot(x, P_raoult, color='black', label=r"$Raoult's\ Law$")
-    plt.legend(loc='best', fontsize=10)
-
-    fig6 = plt.figure(facecolor='white')
-    plt.gca().set_aspect('equal', adjustable='box')
-    plt.title(r"$y-x$")
-    plt.xlim(0, 1)
-    plt.ylim(0, 1)
-    plt.xlabel(r'$x_1$')
-    plt.ylabel(r'$y_1$')
-    plt.scatter(x1, y1)
-    plt.plot(x, y_Wohls, label=r"$Wohls\ model$", color='red')
-    plt.plot(x, x, color='black')
-    plt.legend(loc='best', fontsize=10)
+    fig4, fig5, fig6 = modelPlots(x1, y1, P, G_e, x, w.Ge(x, A), P_Wohls, y_Wohls, P_raoult,
+                                  r"$Wohls\ model$")
 
     return A, acc, fig4, fig5, fig6
@@ -0,0 +1,92 @@
+import json
+import os
+
+# Which compound pairs have a DDBST page, under which name order, and the conditions of their
+# isothermal (T in K) and isobaric (P in kPa) datasets. Written by ingest.py; small enough to
+# ship with the app. With it the pages only offer partners that have data, the page is fetched
+# under its own name order without probing the other one, and pairs without a page are never
+# requested at all.
+
+INDEX_PATH = os.environ.get('VLE_PAIR_INDEX',
+                            os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pair_index.json'))
+KINDS = ('isothermal', 'isobaric')
+
+
+def pair_key(c1, c2):
+    return tuple(sorted((c1, c2)))
+
+
+def write_index(path, snapshot, pairs):
+    # pairs: [(c1, c2, order, datasets)], order the page's name order or None without a page,
+    # datasets its VLEDatasets
+    entries = []
+    for c1, c2, order, datasets in pairs:
+        entry = {'pair': list(pair_key(c1, c2)), 'order': list(order) if order else None}
+        for kind in KINDS:
+            entry[kind] = [dataset.condition for dataset in datasets if dataset.kind == kind]
+        entries.append(entry)
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump({'snapshot': snapshot, 'pairs': entries}, f, indent=1)
+    os.replace(tmp, path)
+
+
+class PairIndex:
+    def __init__(self, snapshot, entries):
+        self.snapshot = snapshot
+        self.entries = {tuple(entry['pair']): entry for entry in entries}
+        # {(compound, kind or None): {partners}}, None for a page of any kind
+        self.partners = {}
+        for (c1, c2), entry in self.entries.items():
+            if entry['order'] is None:
+                continue
+            for kind in (None,) + KINDS:
+                if kind is None or entry[kind]:
+                    self.partners.setdefault((c1, kind), set()).add(c2)
+                    self.partners.setdefault((c2, kind), set()).add(c1)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            index = json.load(f)
+        return cls(index['snapshot'], index['pairs'])
+
+    def lookup(self, c1, c2):
+        # the entry of the pair, None if it was never crawled
+        return self.entries.get(pair_key(c1, c2))
+
+    def order(self, c1, c2):
+        entry = self.lookup(c1, c2)
+        return tuple(entry['order']) if entry is not None and entry['order'] else None
+
+    def has_partner(self, c1, c2, kind=None):
+        return c2 in self.partners.get((c1, kind), ())
+
+
+_indexes = {}
+# off while ingest.py crawls, which writes the index rather than trusting an old one
+ENABLED = True
+
+
+def set_enabled(enabled=True):
+    global ENABLED
+    ENABLED = enabled
+    _indexes.clear()
+
+
+def get_index(path=INDEX_PATH):
+    # the index at path, loaded once; None if nothing has been ingested
+    if not ENABLED:
+        return None
+    if path not in _indexes and os.path.exists(path):
+        _indexes[path] = PairIndex.load(path)
+    return _indexes.get(path)
+
+
+def partners(c1, candidates, kind=None, path=INDEX_PATH):
+    # the candidates DDBST has a page (with a dataset of kind) for together with c1, in their
+    # order; all of them when there is no index or it doesn't know c1
+    index = get_index(path)
+    if index is None or not any(index.lookup(c1, c) is not None for c in candidates if c != c1):
+        return list(candidates)
+    return [c for c in candidates if index.has_partner(c1, c, kind)]
@@ -1,10 +1,12 @@
-import matplotlib.pyplot as plt
 from matplotlib import style
+from matplotlib.figure import Figure
+from matplotlib.collections import LineCollection
 import numpy as np
 # import scipy.optimize as opt
-from antoine import get_psat
+from render import rendered
 
 
+@rendered
 def isothermalPlots(x1, y1, P, p1_s, p2_s):
     style.use('classic')
 
@@ -13,54 +15,201 @@ def isothermalPlots(x1, y1, P, p1_s, p2_s):
     P_raoult = x * p1_s + (1 - x) * p2_s
     y_raoult = x * p1_s / P_raoult
 
-    fig1 = plt.figure(facecolor='white')
-    plt.title(r"$P-x$")
-    plt.xlim(0, 1)
-    plt.ylim(0, 1.2 * max(P))
-    plt.xlabel(r'$x_1$')
-    plt.ylabel(r'$P\ (kPa)$')
-    plt.scatter(x1, P)
-    plt.plot(x, P_raoult, label=r"$Raoult's\ law$", color='black')
-    plt.legend(loc='best', frameon=False)
-
-    fig2 = plt.figure(facecolor='white')
-    plt.gca().set_aspect('equal', adjustable='box')
-    plt.title(r"$y-x$")
-    plt.xlim(0, 1)
-    plt.ylim(0, 1)
-    plt.xlabel(r'$x_1$')
-    plt.ylabel(r'$y_1$')
-    plt.scatter(x1, y1)
-    plt.plot(x, y_raoult, label=r"$Raoult's\ law$", color='black')
-    plt.plot(x, x, color='black')
-    plt.legend(loc='best', frameon=False)
+    fig1 = Figure(facecolor='white')
+    ax = fig1.add_subplot()
+    ax.set_title(r"$P-x$")
+    ax.set_xlim(0, 1)
+    ax.set_ylim(0, 1.2 * max(P))
+    ax.set_xlabel(r'$x_1$')
+    ax.set_ylabel(r'$P\ (kPa)$')
+    ax.scatter(x1, P)
+    ax.plot(x, P_raoult, label=r"$Raoult's\ law$", color='black')
+    ax.legend(loc='best', frameon=False)
+
+    fig2 = Figure(facecolor='white')
+    ax = fig2.add_subplot()
+    ax.set_aspect('equal', adjustable='box')
+    ax.set_title(r"$y-x$")
+    ax.set_xlim(0, 1)
+    ax.set_ylim(0, 1)
+    ax.set_xlabel(r'$x_1$')
+    ax.set_ylabel(r'$y_1$')
+    ax.scatter(x1, y1)
+    ax.plot(x, y_raoult, label=r"$Raoult's\ law$", color='black')
+    ax.plot(x, x, color='black')
+    ax.legend(loc='best', frameon=False)
 
     return fig2, fig1
 
 
+@rendered
 def isobaricPlots(x1, y1, T):
     style.use('classic')
 
     x = np.linspace(0, 1, 10)
 
-    fig1 = plt.figure(facecolor='white')
-    plt.title(r"$T-x-y$")
-    plt.xlim(0, 1)
-    plt.ylim(0.98 * min(T), 1.02 * max(T))
-    plt.xlabel(r'$x_1, y_1$')
-    plt.ylabel(r'$T\ (K)$')
-    plt.scatter(x1, T, label=r'$x_1$', color='blue')
-    plt.scatter(y1, T, label=r'$y_1$', color='orange')
-    plt.legend(loc='best', fontsize=10, frameon=False)
-
-    fig2 = plt.figure(facecolor='white')
-    plt.gca().set_aspect('equal', adjustable='box')
-    plt.title(r"$y-x$")
-    plt.xlim(0, 1)
-    plt.ylim(0, 1)
-    plt.xlabel(r'$x_1$')
-    plt.ylabel(r'$y_1$')
-    plt.scatter(x1, y1)
-    plt.plot(x, x, color='black')
+    fig1 = Figure(facecolor='white')
+    ax = fig1.add_subplot()
+    ax.set_title(r"$T-x-y$")
+    ax.set_xlim(0, 1)
+    ax.set_ylim(0.98 * min(T), 1.02 * max(T))
+    ax.set_xlabel(r'$x_1, y_1$')
+    ax.set_ylabel(r'$T\ (K)$')
+    ax.scatter(x1, T, label=r'$x_1$', color='blue')
+    ax.scatter(y1, T, label=r'$y_1$', color='orange')
+    ax.legend(loc='best', fontsize=10, frameon=False)
+
+    fig2 = Figure(facecolor='white')
+    ax = fig2.add_subplot()
+    ax.set_aspect('equal', adjustable='box')
+    ax.set_title(r"$y-x$")
+    ax.set_xlim(0, 1)
+    ax.set_ylim(0, 1)
+    ax.set_xlabel(r'$x_1$')
+    ax.set_ylabel(r'$y_1$')
+    ax.scatter(x1, y1)
+    ax.plot(x, x, color='black')
 
     return fig2, fig1
+
+
+@rendered
+def modelPlots(x1, y1, P, G_e, x, Ge_model, P_model, y_model, P_raoult, label, P_min=0):
+    # G^E-x, P-x and y-x of a fitted isothermal model against the data
+    style.use('classic')
+
+    fig4 = Figure(facecolor='white')
+    ax = fig4.add_subplot()
+    ax.set_title(r"$G^E-x$")
+    ax.set_xlim(0, 1)
+    ax.set_xlabel(r'$x_1$')
+    ax.set_ylabel(r'$G^E\ (J/mol)$')
+    ax.scatter(x1, G_e)
+    ax.plot(x, Ge_model, label=label, color='red')
+    ax.axhline(0, color='black')
+
+    fig5 = Figure(facecolor='white')
+    ax = fig5.add_subplot()
+    ax.set_title(r"$P-x$")
+    ax.set_xlim(0, 1)
+    ax.set_ylim(P_min, 1.2 * max(P_model))
+    ax.set_xlabel(r'$x_1$')
+    ax.set_ylabel(r'$P\ (kPa)$')
+    ax.scatter(x1, P)
+    ax.plot(x, P_model, label=label, color='red')
+    ax.plot(x, P_raoult, color='black', label=r"$Raoult's\ Law$")
+    ax.legend(loc='best', fontsize=10)
+
+    fig6 = Figure(facecolor='white')
+    ax = fig6.add_subplot()
+    ax.set_aspect('equal', adjustable='box')
+    ax.set_title(r"$y-x$")
+    ax.set_xlim(0, 1)
+    ax.set_ylim(0, 1)
+    ax.set_xlabel(r'$x_1$')
+    ax.set_ylabel(r'$y_1$')
+    ax.scatter(x1, y1)
+    ax.plot(x, y_model, label=label, color='red')
+    ax.plot(x, x, color='black')
+    ax.legend(loc='best', fontsize=10)
+
+    return fig4, fig5, fig6
+
+
+@rendered
+def uniquacPlots(x1, y1, T, gamma1, gamma2, x_pred, T_pred, y_pred, gamma1_pred, gamma2_pred):
+    style.use('classic')
+
+    x = np.linspace(0, 1, 50)
+
+    fig1 = Figure(facecolor='white')
+    ax = fig1.add_subplot()
+    ax.set_aspect('equal', adjustable='box')
+    ax.set_title(r"$y-x$")
+    ax.set_xlim(0, 1)
+    ax.set_ylim(0, 1)
+    ax.set_xlabel(r'$x_1$')
+    ax.set_ylabel(r'$y_1$')
+    ax.scatter(x1, y1)
+    ax.plot(x_pred, y_pred, 'b')
+    ax.plot(x, x, color='grey')
+
+    fig2 = Figure(facecolor='white')
+    ax = fig2.add_subplot()
+    ax.set_title(r"$T-x$")
+    ax.set_xlim(0, 1)
+    ax.set_ylim(0.98 * min(T), 1.02 * max(T))
+    ax.set_xlabel(r'$x_1$')
+    ax.set_ylabel(r'$T\ (K)$')
+    ax.scatter(x1, T, label=r'$x_1$', color='blue')
+    ax.scatter(y1, T, label=r'$y_1$', color='green')
+    ax.plot(x_pred, T_pred, 'b')
+    ax.plot(y_pred, T_pred, 'g')
+    ax.legend(loc='best', fontsize=8, frameon=False)
+
+    fig3 = Figure(facecolor='white')
+    ax = fig3.add_subplot()
+    ax.set_title(r"$\gamma-x$")
+    ax.set_xlim(0, 1)
+    ax.set_xlabel(r'$x_1$')
+    ax.set_ylabel(r'$\gamma$')
+    ax.scatter(x1, gamma1, label=r'$\gamma_1$', color='blue')
+    ax.plot(x_pred, gamma1_pred, color='blue')
+    ax.scatter(x1, gamma2, label=r'$\gamma_2$', color='green')
+    ax.plot(x_pred, gamma2_pred, color='green')
+    ax.legend(loc='best', fontsize=8, frameon=False)
+
+    return fig1, fig2, fig3
+
+
+@rendered
+def mccabeThielePlot(design, x_curve, y_curve, title="McCabe-Thiele Plot"):
+    style.use('classic')
+
+    xd, xb = design['xd'], design['xb']
+
+    fig = Figure(figsize=(7, 7), facecolor='white')
+    ax = fig.add_subplot()
+    fig.suptitle(title)
+    ax.set_xlabel('x')
+    ax.set_ylabel('y')
+    ax.plot(x_curve, y_curve, color='black', linewidth=1)
+    ax.plot([0, 1], [0, 1], color='black', linewidth=1)
+    ax.set_xlim(0, 1)
+    ax.set_ylim(0, 1)
+    ax.grid(color='grey', linewidth=0.3)
+
+    if 'xq' in design:
+        ax.plot([design['xq'], xd], [design['yq'], xd], label='rectifying section', color='b', linewidth=1)
+        ax.plot([design['xq'], xb], [design['yq'], xb], label='stripping section', color='g', linewidth=1)
+        ax.legend(loc='best')
+
+    # every stage step in one artist
+    ax.add_collection(LineCollection(design['staircase'], colors='r', linewidths=1))
+
+    ax.plot([xd, xd], [0, xd], linestyle='--', linewidth=1)
+    ax.plot([xb, xb], [0, xb], linestyle='--', linewidth=1)
+    ax.set_title("Number of stages = infinity" if design['stages'] == float('inf')
+                 else "Number of stages = %d" % design['stages'], size=10)
+
+    return fig
+
+
+@rendered
+def stagesRefluxPlot(table, by='q'):
+    style.use('classic')
+
+    fig = Figure(figsize=(7, 5), facecolor='white')
+    ax = fig.add_subplot()
+    fig.suptitle("Number of stages vs reflux ratio")
+    ax.set_xlabel('R')
+    ax.set_ylabel('N')
+    ax.grid(color='grey', linewidth=0.3)
+    for value, group in table.groupby(by):
+        group = group.sort_values('R')
+        # designs at or below the minimum reflux have no finite stage count
+        ax.plot(group['R'], group['stages'].where(group['stages'] < float('inf')), marker='.',
+                label='%s = %0.3g' % (by, value))
+    ax.legend(loc='best')
+
+    return fig
@@ -0,0 +1,47 @@
+import io
+import os
+from functools import wraps
+import streamlit as st
+from matplotlib.figure import Figure
+import metrics
+from memo import Memo, memoize
+
+# Charts are drawn on matplotlib.figure.Figure objects that pyplot never sees, rasterized once and
+# cleared. The bytes are kept by a hash of everything the plotting function was given, so a rerun
+# with the same data serves the cached image instead of drawing it again.
+
+FORMAT = os.environ.get('VLE_FIGURE_FORMAT', 'png')
+MAX_BYTES = int(os.environ.get('VLE_FIGURE_CACHE_BYTES', 64 * 2 ** 20))
+
+
+def nbytes(images):
+    return len(images) if isinstance(images, bytes) else sum(len(image) for image in images)
+
+
+cache = Memo(maxsize=None, max_bytes=MAX_BYTES, sizeof=nbytes, name='render')
+
+
+def to_bytes(fig, fmt=FORMAT):
+    buf = io.BytesIO()
+    fig.savefig(buf, format=fmt, bbox_inches='tight', facecolor=fig.get_facecolor())
+    fig.clear()
+    return buf.getvalue()
+
+
+def rendered(draw):
+    # draw returns a Figure or a tuple of Figures; the wrapper returns their image bytes in the same shape
+    @wraps(draw)
+    def render(*args, **kwargs):
+        with metrics.span('render', chart=draw.__name__):
+            figs = draw(*args, **kwargs)
+            return to_bytes(figs) if isinstance(figs, Figure) else tuple(to_bytes(fig) for fig in figs)
+
+    return memoize(memo=cache)(render)
+
+
+def show(*images):
+    for image in images:
+        if FORMAT == 'svg':
+            st.markdown(image.decode(), unsafe_allow_html=True)
+        else:
+            st.image(image)
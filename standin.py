@@ -0,0 +1,170 @@
+import argparse
+import gzip
+import hashlib
+import itertools
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# Record/replay of every DDBST and archive response the app fetches, for benchmarks, load tests
+# and runs without network access. With VLE_RECORD=<dir> every response fetch.get receives is
+# saved as a fixture (404s included, the page lookup relies on them); `python standin.py record`
+# crawls all of them at once. `python standin.py serve` answers from the fixtures with optional
+# latency and injected errors, and VLE_STANDIN=<its url> sends fetch.get there instead. A URL
+# without a fixture raises MissingFixture there, so it is never cached as a page that doesn't exist.
+
+FIXTURES_DIR = os.environ.get('VLE_FIXTURES', 'fixtures')
+
+
+class MissingFixture(LookupError):
+    pass
+
+
+class Fixtures:
+    # one gzip'd JSON file per URL: {"url", "status", "content_type", "body"}
+    def __init__(self, directory=FIXTURES_DIR):
+        self.directory = directory
+        self.lock = threading.Lock()
+
+    def path(self, url):
+        return os.path.join(self.directory, hashlib.sha256(url.encode()).hexdigest() + '.json.gz')
+
+    def save(self, url, status, content_type, body):
+        fixture = {'url': url, 'status': status, 'content_type': content_type, 'body': body}
+        path = self.path(url)
+        with self.lock:
+            os.makedirs(self.directory, exist_ok=True)
+            with gzip.open(path + '.tmp', 'wt', encoding='utf-8') as f:
+                json.dump(fixture, f)
+            os.replace(path + '.tmp', path)
+
+    def load(self, url):
+        try:
+            with gzip.open(self.path(url), 'rt', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def record(self, url, response):
+        self.save(url, response.status_code, response.headers.get('Content-Type', 'text/html'), response.text)
+
+    def urls(self):
+        if not os.path.isdir(self.directory):
+            return []
+        found = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.json.gz'):
+                with gzip.open(os.path.join(self.directory, name), 'rt', encoding='utf-8') as f:
+                    found.append(json.load(f)['url'])
+        return found
+
+
+def recorded_urls(compounds, snapshot):
+    from antoine import ANTOINE_URL
+    from density import DENSITY_URL
+    from vledata import page_url
+    urls = [page_url(c1, c2, snapshot) for c1, c2 in itertools.permutations(compounds, 2)]
+    urls += [ANTOINE_URL + c for c in compounds]
+    urls += [DENSITY_URL + c.replace('%20', '+') for c in compounds]
+    return urls
+
+
+def record(directory=FIXTURES_DIR, compounds=None, snapshot=None, log=print):
+    # fetch every URL the app can ask for, straight from the network (no caches in between)
+    from fetch import fan_out, session, TIMEOUT
+    from components import COMPOUNDS
+    from vledata import SNAPSHOT
+    fixtures = Fixtures(directory)
+    urls = recorded_urls(compounds or COMPOUNDS, snapshot or SNAPSHOT)
+
+    def fetch(url):
+        response = session.get(url, timeout=TIMEOUT)
+        fixtures.record(url, response)
+        return response.status_code
+
+    for url, status in zip(urls, fan_out([lambda url=url: fetch(url) for url in urls])):
+        log('%s %s' % (status if not isinstance(status, Exception) else 'failed: %s' % status, url))
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        url = parse_qs(urlparse(self.path).query).get('url', [None])[0]
+        if server.latency or server.jitter:
+            time.sleep(server.latency + server.random.uniform(0, server.jitter))
+        if server.error_rate and server.random.random() < server.error_rate:
+            if server.error_status == 0:
+                # drop the connection without an answer
+                self.close_connection = True
+                return
+            self.send(server.error_status, 'text/plain', 'injected error')
+            return
+        fixture = server.fixtures.load(url) if url else None
+        if fixture is None:
+            self.send(404, 'text/plain', 'no fixture for %s' % url, miss=True)
+        else:
+            self.send(fixture['status'], fixture['content_type'], fixture['body'])
+
+    def send(self, status, content_type, body, miss=False):
+        data = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        if miss:
+            self.send_header('X-Standin', 'miss')
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def serve(directory=FIXTURES_DIR, host='127.0.0.1', port=8503, latency=0.0, jitter=0.0, error_rate=0.0,
+          error_status=503, seed=None, verbose=False):
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.fixtures = Fixtures(directory)
+    server.latency, server.jitter = latency, jitter
+    server.error_rate, server.error_status = error_rate, error_status
+    server.random = random.Random(seed)
+    server.verbose = verbose
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Record DDBST responses or serve them back.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    rec = commands.add_parser('record', help='fetch every VLE, Antoine and DIPPR-105 page into fixtures')
+    rec.add_argument('--fixtures', default=FIXTURES_DIR)
+    rec.add_argument('--snapshot', default=None, help='archive snapshot of the VLE pages')
+    srv = commands.add_parser('serve', help='answer from the fixtures (set VLE_STANDIN to its url)')
+    srv.add_argument('--fixtures', default=FIXTURES_DIR)
+    srv.add_argument('--host', default='127.0.0.1')
+    srv.add_argument('--port', type=int, default=8503)
+    srv.add_argument('--latency', type=float, default=0.0, help='seconds added to every response')
+    srv.add_argument('--jitter', type=float, default=0.0, help='up to this many more seconds, uniformly')
+    srv.add_argument('--error-rate', type=float, default=0.0, help='fraction of requests that fail')
+    srv.add_argument('--error-status', type=int, default=503, help='status of a failed request, 0 drops it')
+    srv.add_argument('--seed', type=int, default=None)
+    srv.add_argument('--verbose', action='store_true')
+    args = parser.parse_args(argv)
+
+    if args.command == 'record':
+        record(args.fixtures, snapshot=args.snapshot)
+    else:
+        server = serve(args.fixtures, args.host, args.port, args.latency, args.jitter, args.error_rate,
+                       args.error_status, args.seed, args.verbose)
+        print('Serving %d fixtures from %s on http://%s:%d' % (len(server.fixtures.urls()), args.fixtures,
+                                                               args.host, args.port))
+        try:
+            server.serve_forever()
+        finally:
+            server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,272 @@
+import hashlib
+import io
+import numpy as np
+import pandas as pd
+from antoine import store as antoine_store
+from cache import DiskCache
+from density import store as density_store
+from fetch import fan_out, get
+from memo import memoize
+from metrics import timed
+from pairindex import get_index
+from vlestore import get_store
+
+SNAPSHOT = '20200220211155'
+VLE_URL = 'https://web.archive.org/web/%s/http://www.ddbst.com/en/EED/VLE%%20%s%%3B%s.php'
+
+# the archive snapshot never changes, so neither pages nor parsed datasets expire
+pages = DiskCache('vle-pages')
+# VLEDataset lists; the namespace changed with the type, older entries hold (condition, table) pairs
+datasets = DiskCache('vle-datasets-2')
+
+
+def page_url(c1, c2, snapshot=SNAPSHOT):
+    return VLE_URL % (snapshot, c1, c2)
+
+
+def pair_key(c1, c2, snapshot=SNAPSHOT):
+    return (snapshot,) + tuple(sorted((c1, c2)))
+
+
+def _indexed(c1, c2, snapshot):
+    # the pair's entry in the availability index, None if the index doesn't cover it
+    index = get_index()
+    if index is not None and index.snapshot == snapshot:
+        return index.lookup(c1, c2)
+    return None
+
+
+def fetch_page(c1, c2, snapshot=SNAPSHOT):
+    # (url, html) of the archived page for the pair in whichever order DDBST lists it, (None, None) if neither exists
+    entry = _indexed(c1, c2, snapshot)
+    if entry is not None and entry['order'] is None:
+        return None, None
+
+    def fetch():
+        if entry is not None:
+            urls = [page_url(*entry['order'], snapshot=snapshot)]
+        else:
+            # both name orders are probed at once, the body of the one that exists is kept
+            urls = [page_url(c1, c2, snapshot), page_url(c2, c1, snapshot)]
+        for url, response in zip(urls, fan_out([lambda url=url: get(url) for url in urls])):
+            if isinstance(response, Exception):
+                raise response
+            if response.status_code == 404:
+                continue
+            response.raise_for_status()
+            return url, response.text
+        return None, None
+
+    return pages.get_or_fetch(pair_key(c1, c2, snapshot), fetch)
+
+
+def _ingested(c1, c2, snapshot):
+    store = get_store()
+    if store is not None and store.snapshot == snapshot and store.has_pair(c1, c2):
+        return store
+    return None
+
+
+@memoize()
+def link_generator(c1, c2, snapshot=SNAPSHOT):
+    store = _ingested(c1, c2, snapshot)
+    if store is not None:
+        return store.url(c1, c2)
+    entry = _indexed(c1, c2, snapshot)
+    if entry is not None:
+        return page_url(*entry['order'], snapshot=snapshot) if entry['order'] else None
+    return fetch_page(c1, c2, snapshot)[0]
+
+
+def cell_text(element):
+    return ' '.join(''.join(element.itertext()).split())
+
+
+def to_number(text):
+    try:
+        return float(text.replace(',', ''))
+    except ValueError:
+        return np.nan
+
+
+def condition_of(first_rows, index):
+    # the second cell of the table opened before table index, nan if there is none or it isn't a number
+    before = first_rows[index - 1] if index > 0 else None
+    return to_number(before[1]) if before is not None and len(before) > 1 else np.nan
+
+
+def is_vle_header(header):
+    return len(header) == 3 and ('P' in header[0] or 'T' in header[0]) and 'x1' in header[1] and 'y1' in header[2]
+
+
+def scan_datasets(html):
+    # [(condition, header, values)] in one streaming pass over the page: header the names of a
+    # P-x1-y1 or T-x1-y1 table (a single row of <th> cells), values its rows as an (n, 3) float
+    # array (nan where a cell isn't a number) and condition the second cell of the table opened
+    # before it. A VLE table without a numeric condition is skipped, it can't be fitted at any T
+    # or P. Of every other table only the first row is kept, rows are freed once read.
+    from lxml import etree
+    data = html.encode('utf-8') if isinstance(html, str) else html
+    first_rows = []  # by the order tables open in, which is what "the table before" means
+    open_tables = []  # innermost last, cells belong to it
+    found = []
+    for event, element in etree.iterparse(io.BytesIO(data), events=('start', 'end'), tag=('table', 'tr', 'td', 'th'),
+                                          html=True, encoding='utf-8'):
+        if event == 'start':
+            if element.tag == 'table':
+                first_rows.append(None)
+                open_tables.append({'index': len(first_rows) - 1, 'header': None, 'rows': [], 'row': None})
+            elif element.tag == 'tr' and open_tables:
+                open_tables[-1]['row'] = []
+            continue
+        if not open_tables:
+            continue
+        table = open_tables[-1]
+        if element.tag in ('td', 'th'):
+            if table['row'] is not None:
+                table['row'].append((element.tag, cell_text(element)))
+        elif element.tag == 'tr':
+            row, table['row'] = table['row'], None
+            if row:
+                texts = [text for _, text in row]
+                if first_rows[table['index']] is None:
+                    first_rows[table['index']] = texts
+                if all(tag == 'th' for tag, _ in row) and not table['rows']:
+                    # a second header row makes a multi-level header, never a VLE table
+                    table['header'] = texts if table['header'] is None else []
+                elif table['header'] and is_vle_header(table['header']):
+                    table['rows'].append([to_number(text) for text in texts[:3]] + [np.nan] * (3 - len(texts)))
+            element.clear()
+        else:
+            open_tables.pop()
+            if table['header'] and is_vle_header(table['header']):
+                condition = condition_of(first_rows, table['index'])
+                if not np.isnan(condition):
+                    found.append((condition, table['header'], np.array(table['rows'], dtype=float).reshape(-1, 3)))
+            element.clear()
+    return found
+
+
+KINDS = {'P [kPa]': 'isothermal', 'T [K]': 'isobaric'}
+
+
+class VLEDataset:
+    # One DDBST dataset as contiguous float64 arrays: x1, y1 of pair[0] (the page's name order) and
+    # T, P at every point, the constant one (T of isothermal, P of isobaric data) filled with the
+    # condition. The arrays are never changed in place; cache_key is a digest of all of it.
+    __slots__ = ('pair', 'kind', 'condition', 'x1', 'y1', 'T', 'P', '_key')
+
+    def __init__(self, pair, kind, condition, x1, y1, T, P):
+        self.pair = tuple(pair)
+        self.kind = kind
+        self.condition = float(condition)
+        self.x1, self.y1, self.T, self.P = (np.ascontiguousarray(a, dtype=np.float64) for a in (x1, y1, T, P))
+        self._key = None
+
+    @classmethod
+    def from_columns(cls, pair, condition, header, values):
+        # a table of scan_datasets, the first column P (isothermal) or T (isobaric)
+        kind = KINDS[header[0]]
+        first, x1, y1 = np.asarray(values, dtype=np.float64).reshape(-1, 3).T
+        constant = np.full(len(x1), float(condition))
+        if kind == 'isothermal':
+            return cls(pair, kind, condition, x1, y1, constant, first)
+        return cls(pair, kind, condition, x1, y1, first, constant)
+
+    @classmethod
+    def from_record(cls, record):
+        return cls(record['pair'], record['kind'], record['condition'], record['x1'], record['y1'], record['T'],
+                   record['P'])
+
+    def to_record(self):
+        return {'pair': self.pair, 'kind': self.kind, 'condition': self.condition,
+                'x1': self.x1, 'y1': self.y1, 'T': self.T, 'P': self.P}
+
+    def to_table(self):
+        # the table as DDBST shows it, for display
+        first = ('P [kPa]', self.P) if self.kind == 'isothermal' else ('T [K]', self.T)
+        return pd.DataFrame({first[0]: first[1], 'x1 [mol/mol]': self.x1, 'y1 [mol/mol]': self.y1})
+
+    @property
+    def unit(self):
+        # of the condition
+        return 'K' if self.kind == 'isothermal' else 'kPa'
+
+    @property
+    def cache_key(self):
+        if self._key is None:
+            h = hashlib.sha256(repr((self.pair, self.kind, self.condition, len(self.x1))).encode())
+            for a in (self.x1, self.y1, self.T, self.P):
+                h.update(a.tobytes())
+            self._key = h.hexdigest()
+        return self._key
+
+    def __len__(self):
+        return len(self.x1)
+
+    def __repr__(self):
+        return 'VLEDataset(%s/%s, %s at %g %s, %d points)' % (self.pair + (self.kind, self.condition, self.unit,
+                                                                           len(self)))
+
+    def interior(self):
+        # without the pure-component points, which carry no activity coefficient
+        keep = (self.x1 > 0) & (self.x1 < 1)
+        if keep.all():
+            return self
+        return VLEDataset(self.pair, self.kind, self.condition, self.x1[keep], self.y1[keep], self.T[keep],
+                          self.P[keep])
+
+
+def stack(found):
+    # many datasets as one (n, 4) array of x1, y1, T, P rows, dataset i in rows offsets[i]:offsets[i + 1]
+    offsets = np.concatenate(([0], np.cumsum([len(d) for d in found]))).astype(np.int64)
+    values = np.empty((offsets[-1], 4))
+    for d, start, end in zip(found, offsets[:-1], offsets[1:]):
+        values[start:end] = np.column_stack((d.x1, d.y1, d.T, d.P))
+    return offsets, values
+
+
+def page_order(url, c1, c2, snapshot=SNAPSHOT):
+    # the pair in the order the page names it, which is the order x1 and y1 refer to
+    return (c1, c2) if url == page_url(c1, c2, snapshot) else (c2, c1)
+
+
+@timed('parse', page='vle')
+def parse_datasets(html, pair):
+    # every P-x1-y1 (isothermal, condition T in K) and T-x1-y1 (isobaric, condition P in kPa)
+    # table on the page of pair (in the page's order) as a VLEDataset
+    return [VLEDataset.from_columns(pair, condition, header, values)
+            for condition, header, values in scan_datasets(html) if header[0] in KINDS]
+
+
+@memoize()
+def get_datasets(c1, c2, snapshot=SNAPSHOT):
+    store = _ingested(c1, c2, snapshot)
+    if store is not None:
+        return [VLEDataset.from_record(record) for record in store.datasets(c1, c2)]
+    entry = _indexed(c1, c2, snapshot)
+    if entry is not None and not (entry['isothermal'] or entry['isobaric']):
+        return []
+
+    def fetch():
+        url, html = fetch_page(c1, c2, snapshot)
+        return [] if html is None else parse_datasets(html, page_order(url, c1, c2, snapshot))
+
+    return datasets.get_or_fetch(pair_key(c1, c2, snapshot), fetch)
+
+
+def prefetch(c1, c2, densities=False):
+    # warm every cache one render needs (VLE page, Antoine and optionally DIPPR-105 constants of
+    # both components) with concurrent requests; failures are raised again where the data is used
+    calls = [lambda: get_datasets(c1, c2), lambda: antoine_store.params(c1), lambda: antoine_store.params(c2)]
+    if densities:
+        calls += [lambda: density_store.params(c1), lambda: density_store.params(c2)]
+    return fan_out(calls)
+
+
+def isothermal_datasets(found):
+    return [d for d in found if d.kind == 'isothermal']
+
+
+def isobaric_datasets(found):
+    return [d for d in found if d.kind == 'isobaric']
@@ -0,0 +1,116 @@
+import os
+import numpy as np
+
+# Columnar store of every crawled compound pair, written by ingest.py.
+#
+# pairs:     (m, 3) compound 1, compound 2, page url ('' when DDBST has no page) for every crawled pair
+# datasets:  pair (n, 2) in page order (x1 refers to the first one), kind, condition (T in K for
+#            isothermal, P in kPa for isobaric), offsets (n + 1) into the concatenated x1, y1, T, P columns
+# antoine:   component, offsets into the concatenated A, B, C, Tmin, Tmax coefficient sets
+# dippr105:  component and one row of A, B, C, D, Tmin, Tmax each
+
+STORE_PATH = os.environ.get('VLE_STORE',
+                            os.path.join(os.path.dirname(os.path.abspath(__file__)), 'vle_store.npz'))
+ANTOINE_KEYS = ('A', 'B', 'C', 'Tmin', 'Tmax')
+DIPPR_KEYS = ('A', 'B', 'C', 'D', 'Tmin', 'Tmax')
+
+
+def write_store(path, snapshot, pairs, datasets, antoine, dippr):
+    # pairs: [(c1, c2, url or None)], datasets: [VLEDataset],
+    # antoine: {component: {key: array}}, dippr: {component: {key: float}}
+    from vledata import stack  # vledata reads the store, so not at import time
+    offsets, values = stack(datasets)
+    columns = {
+        'snapshot': np.array(snapshot),
+        'pairs': np.array([(c1, c2, url or '') for c1, c2, url in pairs], dtype=str).reshape(-1, 3),
+        'pair': np.array([d.pair for d in datasets], dtype=str).reshape(-1, 2),
+        'kind': np.array([d.kind for d in datasets], dtype=str),
+        'condition': np.array([d.condition for d in datasets], dtype=float),
+        'offsets': offsets,
+    }
+    for j, key in enumerate(('x1', 'y1', 'T', 'P')):
+        columns[key] = np.ascontiguousarray(values[:, j])
+
+    components = sorted(antoine)
+    columns['antoine_component'] = np.array(components, dtype=str)
+    columns['antoine_offsets'] = np.concatenate(
+        ([0], np.cumsum([len(antoine[c]['A']) for c in components]))).astype(np.int64)
+    for key in ANTOINE_KEYS:
+        columns['antoine_' + key] = np.concatenate([antoine[c][key] for c in components] or [np.zeros(0)])
+
+    components = sorted(dippr)
+    columns['dippr_component'] = np.array(components, dtype=str)
+    for key in DIPPR_KEYS:
+        columns['dippr_' + key] = np.array([dippr[c][key] for c in components], dtype=float)
+
+    tmp = path + '.tmp.npz'
+    np.savez_compressed(tmp, **columns)
+    os.replace(tmp, path)
+
+
+class VLEStore:
+    def __init__(self, path=STORE_PATH):
+        with np.load(path, allow_pickle=False) as data:
+            self.columns = {key: data[key] for key in data.files}
+        c = self.columns
+        self.snapshot = str(c['snapshot'])
+        self.urls = {tuple(sorted((c1, c2))): url or None for c1, c2, url in c['pairs']}
+        self.index = {}
+        for i, (c1, c2) in enumerate(c['pair']):
+            self.index.setdefault(tuple(sorted((c1, c2))), []).append(i)
+        self.antoine_index = {comp: i for i, comp in enumerate(c['antoine_component'])}
+        self.dippr_index = {comp: i for i, comp in enumerate(c['dippr_component'])}
+
+    def __len__(self):
+        return len(self.columns['kind'])
+
+    def has_pair(self, c1, c2):
+        return tuple(sorted((c1, c2))) in self.urls
+
+    def url(self, c1, c2):
+        return self.urls[tuple(sorted((c1, c2)))]
+
+    def record(self, i):
+        c = self.columns
+        start, end = c['offsets'][i], c['offsets'][i + 1]
+        record = {'pair': tuple(c['pair'][i]), 'kind': str(c['kind'][i]), 'condition': float(c['condition'][i])}
+        for key in ('x1', 'y1', 'T', 'P'):
+            record[key] = c[key][start:end]
+        return record
+
+    def datasets(self, c1, c2):
+        return [self.record(i) for i in self.index.get(tuple(sorted((c1, c2))), [])]
+
+    def antoine(self, component):
+        i = self.antoine_index.get(component)
+        if i is None:
+            return None
+        start, end = self.columns['antoine_offsets'][i], self.columns['antoine_offsets'][i + 1]
+        return {key: self.columns['antoine_' + key][start:end] for key in ANTOINE_KEYS}
+
+    def dippr(self, component):
+        i = self.dippr_index.get(component)
+        if i is None:
+            return None
+        return {key: float(self.columns['dippr_' + key][i]) for key in DIPPR_KEYS}
+
+
+_stores = {}
+# off while ingest.py crawls, so a re-run fetches everything again instead of copying the old store
+ENABLED = True
+
+
+def set_enabled(enabled=True):
+    # either way the stores are read again when next asked for
+    global ENABLED
+    ENABLED = enabled
+    _stores.clear()
+
+
+def get_store(path=STORE_PATH):
+    # the store at path, loaded once; None if nothing has been ingested
+    if not ENABLED:
+        return None
+    if path not in _stores and os.path.exists(path):
+        _stores[path] = VLEStore(path)
+    return _stores.get(path)
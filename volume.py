@@ -1,9 +1,9 @@
-import pandas as pd
-from density import get_density
-
-molecular_weights = pd.read_csv("molecularWeights.txt", sep='!', names=['Compounds', 'MW'])
-molecular_weights = dict(zip(molecular_weights['Compounds'], molecular_weights['MW']))
+from components import get_registry
+from density import store as density_store
+from memo import memoize
 
 
+@memoize()
 def get_volume(s, T):
-    return 0.001 * molecular_weights[s] / get_density(s, T)
+    registry = get_registry()
+    return 0.001 * registry.mw[registry.id(s)] / density_store.rho(s, T)  # in m3/mol